@@ -0,0 +1,145 @@
+import asyncio
+from typing import List, Dict, Optional
+
+import httpx
+
+from scraper import VnExpressScraper, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_PARSER
+
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 4
+
+class AsyncVnExpressScraper(VnExpressScraper):
+    """Awaitable counterpart of VnExpressScraper for use inside an event loop
+
+    All requests go through one shared httpx.AsyncClient, so connections are kept
+    alive and reused between calls. They are sent through the scraper's request
+    controller (RequestController.aget), so they are retried, circuit-broken and
+    limited to the host's adaptive concurrency and the requests-per-second cap
+    like the threaded scraper's. HTML parsing and retry queue writes run in a
+    worker thread so they do not block the event loop.
+    """
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 base_url: str = "https://vnexpress.net",
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 use_http_cache: bool = True,
+                 parser: str = DEFAULT_PARSER):
+        super().__init__(requests_per_second, max_workers, base_url, use_http_cache, parser)
+        # Sizes the keep-alive pool; how many requests run at once follows the
+        # controller's adaptive limit for the host
+        self.max_connections_per_host = max_connections_per_host
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive connection pool, created on first use"""
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=max(self.max_workers, self.max_connections_per_host),
+                max_keepalive_connections=self.max_connections_per_host
+            )
+            self._client = httpx.AsyncClient(
+                headers=dict(self.session.headers),
+                limits=limits,
+                follow_redirects=True
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, url: str, timeout: float, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET a URL through the shared pool and the request controller"""
+        return await self.controller.aget(url, lambda: self.client.get(url, timeout=timeout, headers=headers))
+
+    async def fetch(self, url: str, timeout: float) -> bytes:
+        """GET a URL and return its body, raising on error statuses"""
+        response = await self.request(url, timeout)
+        response.raise_for_status()
+        return response.content
+
+    async def fetch_listing(self, url: str):
+        """Download a listing page, conditionally if it is in the HTTP cache"""
+        if self.http_cache is None:
+            return await self.fetch(url, timeout=10), False
+
+        response = await self.request(url, timeout=10, headers=self.http_cache.conditional_headers(url))
+        if response.status_code == 304:
+            return self.http_cache.not_modified(url), True
+        response.raise_for_status()
+        return response.content, self.http_cache.store(url, response.headers, response.content)
+
+    async def get_article_links(self, category: str = '', limit: int = 20) -> List[str]:
+        """Get article links from VnExpress homepage or category page"""
+        try:
+            url = self.category_url(category)
+            content, unchanged = await self.fetch_listing(url)
+            return await asyncio.to_thread(self.parse_listing, url, f'links:{limit}', unchanged,
+                                           self.parse_article_links, content, limit)
+        except Exception as e:
+            print(f"Error getting article links: {e}")
+            return []
+
+    async def get_article_links_from_page(self, category: str, page: int, limit: int = 10) -> List[str]:
+        """Get article links from a specific page number"""
+        try:
+            url = self.page_url(category, page)
+            if not url:
+                return []
+            content, unchanged = await self.fetch_listing(url)
+            return await asyncio.to_thread(self.parse_listing, url, f'page_links:{limit}', unchanged,
+                                           self.parse_page_links, content, limit)
+        except Exception as e:
+            print(f"Error getting article links from page {page}: {e}")
+            return []
+
+    async def scrape_article(self, url: str) -> Optional[Dict]:
+        """Scrape a single article from VnExpress"""
+        try:
+            content = await self.fetch(url, timeout=15)
+            return await asyncio.to_thread(self.parse_article, url, content)
+        except Exception as e:
+            print(f"Error scraping article {url}: {e}")
+            if self.retry_queue is not None:
+                await asyncio.to_thread(self.defer, url, e)
+            return None
+
+    async def collect_article_links(self, category: str = '', limit: int = 20) -> List[str]:
+        """Discover up to limit article links that still need to be fetched"""
+        article_links = self.filter_new_links(
+            await self.get_article_links(category, self.listing_window(limit, [])), []
+        )
+
+        # If we don't have enough links from main page, try to get more from paginated results
+        page = 2
+        while len(article_links) < limit and category and page <= self.max_pages:
+            print(f"Found {len(article_links)} links, trying to get more from page {page}...")
+            page_links = await self.get_article_links_from_page(
+                category, page, self.listing_window(limit, article_links)
+            )
+            new_links = self.filter_new_links(page_links, article_links)
+            if not new_links:
+                break
+            article_links.extend(new_links)
+            page += 1
+
+        return article_links[:limit]
+
+    async def scrape_multiple_articles(self, category: str = '', limit: int = 20) -> List[Dict]:
+        """Scrape multiple articles, at most max_workers at a time"""
+        print(f"Getting article links for category: {category}")
+        article_links = await self.collect_article_links(category, limit)
+
+        print(f"Found {len(article_links)} article links")
+        workers = asyncio.Semaphore(self.max_workers)
+
+        async def scrape(i: int, url: str) -> Optional[Dict]:
+            async with workers:
+                print(f"Scraping article {i}/{len(article_links)}: {url}")
+                return await self.scrape_article(url)
+
+        results = await asyncio.gather(*(scrape(i, url) for i, url in enumerate(article_links, 1)))
+        return [article_data for article_data in results if article_data]
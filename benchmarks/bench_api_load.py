@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Concurrent HTTP load on the read endpoints, async DB sessions vs blocking ones
+Usage: python benchmarks/bench_api_load.py [--list-clients N] [--search-clients N] [--seconds S]
+
+Starts the API (one uvicorn worker) twice on a seeded temporary database:
+"blocking" overrides get_async_read_db with a wrapper that runs the queries on
+a synchronous Session inside the event loop, as the endpoints did before;
+"async" uses the aiosqlite sessions. Listing clients page through /articles
+while search clients run broad (slow) searches; each endpoint reports requests
+per second and p50/p99 latency. The response cache is disabled for the run.
+SQLite releases the GIL while a query runs, so the async gain in throughput
+grows with the number of CPU cores.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('blocking', 'async')
+# Each matches most of the seeded articles, so bm25 ranking has to scan them
+SEARCH_TERMS = ['noi dung', 'bai viet', 'tom tat']
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class BlockingSession:
+    """AsyncSession stand-in that runs every query synchronously on the event loop"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+    async def scalar(self, statement):
+        return self.session.scalar(statement)
+
+    async def scalars(self, statement):
+        return self.session.scalars(statement)
+
+    def expunge(self, instance):
+        self.session.expunge(instance)
+
+def serve(mode: str, port: int):
+    """Run the API in this process (the child started by run_mode)"""
+    sys.path.insert(0, ROOT)
+    import uvicorn
+    import main
+    from database import ReadSessionLocal, get_async_read_db
+
+    if mode == 'blocking':
+        async def blocking_read_db():
+            db = ReadSessionLocal()
+            try:
+                yield BlockingSession(db)
+            finally:
+                db.close()
+        main.app.dependency_overrides[get_async_read_db] = blocking_read_db
+
+    uvicorn.run(main.app, host='127.0.0.1', port=port, log_level='warning')
+
+def list_path(rows: int) -> str:
+    return f"/articles?page={random.randint(1, rows // 20)}&limit=20"
+
+def search_path(rows: int) -> str:
+    return f"/articles/search/{random.choice(SEARCH_TERMS)}?page={random.randint(1, 5)}&limit=20"
+
+async def load(base_url: str, args):
+    latencies = {'/articles': [], '/articles/search': []}
+    errors = 0
+    deadline = time.perf_counter() + args.seconds
+
+    async def client_loop(client: httpx.AsyncClient, endpoint: str, make_path):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(make_path(args.rows))
+                response.raise_for_status()
+            except Exception:
+                errors += 1
+                continue
+            latencies[endpoint].append(time.perf_counter() - started)
+
+    clients = args.list_clients + args.search_clients
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(
+            *(client_loop(client, '/articles', list_path) for _ in range(args.list_clients)),
+            *(client_loop(client, '/articles/search', search_path) for _ in range(args.search_clients))
+        )
+    return latencies, errors
+
+def wait_ready(base_url: str, proc: subprocess.Popen):
+    for _ in range(300):
+        if proc.poll() is not None:
+            raise RuntimeError("API process exited during startup")
+        try:
+            httpx.get(f"{base_url}/health", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("API did not start")
+
+def run_mode(mode: str, args, env: dict):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(port)], env=env)
+    try:
+        wait_ready(base_url, proc)
+        return asyncio.run(load(base_url, args))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description='API read endpoint load benchmark')
+    parser.add_argument('--list-clients', type=int, default=16, help='Clients paging through /articles')
+    parser.add_argument('--search-clients', type=int, default=4, help='Clients running searches')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration per mode')
+    parser.add_argument('--rows', type=int, default=5000, help='Articles seeded before the run')
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   COORDINATION_URL=os.path.join(tmp, 'coordination.db'),
+                   RESPONSE_CACHE_MAX_BYTES='0',
+                   RESPONSE_CACHE_SHARED='false',
+                   ENABLE_SCHEDULER='false')
+        seed = ("from bench_sqlite_load import seed, setup_env; import os; "
+                "seed(os.getenv('SQLITE_PROFILE', 'tuned'), os.environ['DATABASE_URL'][len('sqlite:///'):], "
+                f"{args.rows})")
+        subprocess.run([sys.executable, '-c', seed], env=env, cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+        for mode in MODES:
+            latencies, errors = run_mode(mode, args, env)
+            completed = sum(len(values) for values in latencies.values())
+            print(f"== {mode}: {completed / args.seconds:.1f} req/s (errors: {errors}, cpus: {os.cpu_count()})")
+            for endpoint, values in latencies.items():
+                if len(values) < 2:
+                    continue
+                p99 = statistics.quantiles(values, n=100)[-1]
+                print(f"  {endpoint:17} {len(values) / args.seconds:7.1f} req/s  "
+                      f"p50 {statistics.median(values) * 1000:8.2f} ms  p99 {p99 * 1000:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Link discovery cost: HTML listing pages against RSS feeds and sitemaps
+Usage: python benchmarks/bench_discovery.py [fixtures_dir] [--repeat N] [--fetch CATEGORY ...]
+
+Fixtures are recorded listings: <category>.html (the category page, or
+homepage.html), <category>.rss (its feed) and any *.xml sitemaps. Small ones
+for the homepage and thoi-su plus a news sitemap are committed in
+benchmarks/fixtures/listings, the default, so the benchmark runs offline.
+Use --fetch to record the current pages of some categories first.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feeds import feed_url, parse_rss, parse_sitemap
+from scraper import VnExpressScraper, LISTING_PAGE_WINDOW
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'listings')
+
+def fetch_fixtures(directory: str, categories):
+    """Save the live listing page and RSS feed of each category"""
+    scraper = VnExpressScraper(use_http_cache=False)
+    os.makedirs(directory, exist_ok=True)
+    for category in categories:
+        listing = '' if category == 'homepage' else category
+        for url, suffix in ((scraper.category_url(listing), 'html'), (feed_url(scraper.base_url, listing), 'rss')):
+            response = scraper.session.get(url, timeout=15)
+            response.raise_for_status()
+            path = os.path.join(directory, f"{category}.{suffix}")
+            with open(path, 'wb') as f:
+                f.write(response.content)
+            print(f"Saved {path}")
+            time.sleep(1)
+
+def html_links(scraper, content):
+    return scraper.parse_article_links(content, LISTING_PAGE_WINDOW)
+
+def rss_links(scraper, content):
+    return [item.url for item in parse_rss(content) if scraper.is_valid_article_url(item.url)]
+
+def sitemap_links(scraper, content):
+    urls, _ = parse_sitemap(content)
+    return [item.url for item in urls if scraper.is_valid_article_url(item.url)]
+
+BACKENDS = (('html', '*.html', html_links), ('rss', '*.rss', rss_links), ('sitemap', '*.xml', sitemap_links))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark link discovery backends')
+    parser.add_argument('fixtures', nargs='?', default=DEFAULT_FIXTURES_DIR, help='Directory of recorded listings')
+    parser.add_argument('--repeat', '-r', type=int, default=20, help='Parses per fixture')
+    parser.add_argument('--fetch', nargs='*', help='Record these categories first (homepage for the homepage)')
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_fixtures(args.fixtures, args.fetch)
+
+    scraper = VnExpressScraper(use_http_cache=False)
+    print(f"{'Backend':<8} {'Files':>5} {'KB/file':>8} {'Links/file':>10} {'ms/file':>8} {'us/link':>8}")
+    measured = False
+    for name, pattern, extract in BACKENDS:
+        paths = sorted(glob.glob(os.path.join(args.fixtures, pattern)))
+        if not paths:
+            continue
+        sizes, links, timings = [], [], []
+        for path in paths:
+            with open(path, 'rb') as f:
+                content = f.read()
+            sizes.append(len(content))
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                found = extract(scraper, content)
+                timings.append((time.perf_counter() - started) * 1000)
+            links.append(len(found))
+        per_file = statistics.median(timings)
+        per_link = per_file * 1000 / max(statistics.mean(links), 1)
+        print(f"{name:<8} {len(paths):>5} {statistics.mean(sizes) / 1024:>8.1f} {statistics.mean(links):>10.1f} "
+              f"{per_file:>8.2f} {per_link:>8.1f}")
+        measured = True
+
+    if not measured:
+        sys.exit(f"No fixtures in {args.fixtures} (use --fetch CATEGORY ... to record some)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Per-article parse time of each article parser backend
+Usage: python benchmarks/bench_parsers.py [fixtures_dir] [--repeat N] [--fetch N]
+
+Fixtures are saved VnExpress article pages (*.html). A few small pages in the
+site's article markup are committed in benchmarks/fixtures/articles, the
+default, so the benchmark runs offline. Use --fetch to save the current
+homepage articles into the fixtures directory first.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import PARSER_BACKENDS
+from scraper import VnExpressScraper
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'articles')
+
+def fetch_fixtures(directory: str, count: int):
+    """Save live article pages as fixtures"""
+    scraper = VnExpressScraper(use_http_cache=False)
+    os.makedirs(directory, exist_ok=True)
+    for url in scraper.get_article_links('', count):
+        response = scraper.session.get(url, timeout=15)
+        response.raise_for_status()
+        path = os.path.join(directory, url.rstrip('/').rsplit('/', 1)[-1])
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        print(f"Saved {path}")
+        time.sleep(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark article parser backends')
+    parser.add_argument('fixtures', nargs='?', default=DEFAULT_FIXTURES_DIR, help='Directory of saved article pages')
+    parser.add_argument('--repeat', '-r', type=int, default=10, help='Parses per fixture and backend')
+    parser.add_argument('--fetch', type=int, default=0, help='Download this many live articles as fixtures first')
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_fixtures(args.fixtures, args.fetch)
+
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(args.fixtures, '*.html'))):
+        with open(path, 'rb') as f:
+            fixtures.append((f"https://vnexpress.net/{os.path.basename(path)}", f.read()))
+    if not fixtures:
+        sys.exit(f"No *.html fixtures in {args.fixtures} (use --fetch N to save some)")
+
+    results = {}
+    for backend in PARSER_BACKENDS:
+        scraper = VnExpressScraper(use_http_cache=False, parser=backend)
+        timings = []
+        for url, content in fixtures:
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                scraper.parse_article(url, content)
+                timings.append(time.perf_counter() - started)
+        results[backend] = [scraper.parse_article(url, content) for url, content in fixtures]
+        print(f"{backend:12} median {statistics.median(timings) * 1000:7.2f} ms/article, "
+              f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:7.2f} ms/article")
+
+    # The fast path should extract the same fields as the reference backend
+    reference = results['html.parser']
+    for backend, parsed in results.items():
+        mismatches = sum(1 for a, b in zip(parsed, reference) if a != b)
+        if mismatches:
+            print(f"{backend}: {mismatches}/{len(fixtures)} fixtures differ from html.parser output")
+
+if __name__ == '__main__':
+    main()
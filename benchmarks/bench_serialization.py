@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Serialization cost of an /articles page: response models vs the orjson path
+Usage: python benchmarks/bench_serialization.py [--rows N] [--repeat N]
+
+"models" is what FastAPI did for the list endpoints: build NewsArticleList from
+ORM objects (from_attributes validation), run jsonable_encoder and render a
+JSONResponse. "orjson" is the path main.py uses now: article_dict per row and
+an ORJSONResponse. Both run on the same in-memory articles and the script
+checks that they produce identical bytes before timing them.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Importing database creates the schema, so point it at a throwaway file
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from database import NewsArticle
+from main import list_content
+from projections import article_dict
+from schemas import NewsArticleList
+
+def fake_articles(count: int):
+    base = datetime(2024, 1, 1, 8, 30)
+    return [NewsArticle(
+        id=i + 1,
+        title=f"Bài viết số {i} về thời sự Việt Nam",
+        content="Nội dung bài viết với đầy đủ dấu tiếng Việt. " * 120,
+        summary="Tóm tắt ngắn gọn của bài viết. " * 5,
+        author="Phóng viên",
+        category="Thời sự",
+        url=f"https://vnexpress.net/bai-viet-{i}.html",
+        image_url=f"https://i.vnecdn.net/{i}.jpg",
+        published_date=base - timedelta(minutes=i, microseconds=i * 1000),
+        scraped_date=base,
+        is_active=True,
+        view_count=i,
+        tags='["thoi-su"]',
+    ) for i in range(count)]
+
+def render_models(articles, limit: int) -> bytes:
+    result = NewsArticleList(articles=articles, total=1000, page=1, limit=limit,
+                             total_pages=(1000 + limit - 1) // limit, next_cursor=None)
+    return JSONResponse(content=jsonable_encoder(result)).body
+
+def render_orjson(articles, limit: int) -> bytes:
+    content = list_content([article_dict(article) for article in articles], 1000, 1, limit, None)
+    return ORJSONResponse(content).body
+
+def timed(render, articles, limit: int, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render(articles, limit)
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description='Article list serialization benchmark')
+    parser.add_argument('--rows', type=int, default=100, help='Articles per page')
+    parser.add_argument('--repeat', type=int, default=200, help='Renders per path')
+    args = parser.parse_args()
+
+    articles = fake_articles(args.rows)
+    models_body = render_models(articles, args.rows)
+    orjson_body = render_orjson(articles, args.rows)
+    if models_body != orjson_body:
+        sys.exit("Output differs between the two paths")
+    print(f"{args.rows} articles, {len(orjson_body)} bytes, identical output")
+
+    models_time = timed(render_models, articles, args.rows, args.repeat)
+    orjson_time = timed(render_orjson, articles, args.rows, args.repeat)
+    print(f"models: {models_time * 1000:.2f} ms per page")
+    print(f"orjson: {orjson_time * 1000:.2f} ms per page ({models_time / orjson_time:.1f}x faster)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write load on the article database under each SQLite profile
+Usage: python benchmarks/bench_sqlite_load.py [--readers N] [--seconds S] [--rows N]
+
+Reader processes stand in for gunicorn workers: they page through /articles-style
+queries and bump view counts like GET /articles/{id}. A writer process ingests
+batches of new articles like a scheduled scrape. Each profile runs against its
+own fresh database file and reports p50/p99 latency per operation.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ('default', 'tuned')
+
+def setup_env(profile: str, path: str):
+    """Must run before the first import of database in a process"""
+    sys.path.insert(0, ROOT)
+    os.environ['SQLITE_PROFILE'] = profile
+    os.environ['DATABASE_URL'] = f"sqlite:///{path}"
+    os.environ['RESPONSE_CACHE_SHARED'] = 'false'
+
+def fake_articles(start: int, count: int):
+    base = datetime(2024, 1, 1)
+    return [{
+        'url': f"https://vnexpress.net/bench-{i}.html",
+        'title': f"Bài viết {i}",
+        'summary': "Tóm tắt " * 20,
+        'content': "Nội dung bài viết. " * 200,
+        'category': random.choice(['Thời sự', 'Thế giới', 'Kinh doanh']),
+        'published_date': base + timedelta(minutes=i),
+        'tags': ['bench'],
+    } for i in range(start, start + count)]
+
+def seed(profile: str, path: str, rows: int):
+    setup_env(profile, path)
+    from database import SessionLocal
+    from ingestion import ingest_articles
+    db = SessionLocal()
+    for start in range(0, rows, 1000):
+        ingest_articles(db, fake_articles(start, min(1000, rows - start)))
+    db.close()
+
+def reader(profile: str, path: str, seconds: float, rows: int, results):
+    setup_env(profile, path)
+    from sqlalchemy import desc
+    from database import ReadSessionLocal, SessionLocal, NewsArticle
+    timings = {'list_page': [], 'view_count': []}
+    errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            if random.random() < 0.8:
+                db = ReadSessionLocal()
+                db.query(NewsArticle).filter(NewsArticle.is_active == True).order_by(
+                    desc(NewsArticle.published_date)).offset(random.randint(0, 50) * 20).limit(20).all()
+                db.close()
+                timings['list_page'].append(time.perf_counter() - started)
+            else:
+                db = SessionLocal()
+                article = db.get(NewsArticle, random.randint(1, rows))
+                if article:
+                    article.view_count += 1
+                    db.commit()
+                db.close()
+                timings['view_count'].append(time.perf_counter() - started)
+        except Exception:
+            errors += 1
+    results.put((timings, errors))
+
+def writer(profile: str, path: str, seconds: float, rows: int, results):
+    setup_env(profile, path)
+    from database import SessionLocal
+    from ingestion import ingest_articles
+    timings = {'ingest_batch': []}
+    errors = 0
+    next_id = rows
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            db = SessionLocal()
+            ingest_articles(db, fake_articles(next_id, 50))
+            db.close()
+            timings['ingest_batch'].append(time.perf_counter() - started)
+        except Exception:
+            errors += 1
+        next_id += 50
+        time.sleep(0.2)
+    results.put((timings, errors))
+
+def run_profile(profile: str, args) -> dict:
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        seeder = ctx.Process(target=seed, args=(profile, path, args.rows))
+        seeder.start()
+        seeder.join()
+
+        results = ctx.Queue()
+        procs = [ctx.Process(target=reader, args=(profile, path, args.seconds, args.rows, results))
+                 for _ in range(args.readers)]
+        procs.append(ctx.Process(target=writer, args=(profile, path, args.seconds, args.rows, results)))
+        for proc in procs:
+            proc.start()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    merged, errors = {}, 0
+    for timings, proc_errors in collected:
+        errors += proc_errors
+        for op, values in timings.items():
+            merged.setdefault(op, []).extend(values)
+    return {'timings': merged, 'errors': errors}
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite profile load benchmark')
+    parser.add_argument('--readers', type=int, default=4, help='Reader processes (API workers)')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration per profile')
+    parser.add_argument('--rows', type=int, default=5000, help='Articles seeded before the run')
+    args = parser.parse_args()
+
+    for profile in PROFILES:
+        result = run_profile(profile, args)
+        print(f"== {profile} (errors: {result['errors']})")
+        for op, values in sorted(result['timings'].items()):
+            if len(values) < 2:
+                continue
+            p99 = statistics.quantiles(values, n=100)[-1]
+            print(f"  {op:13} n={len(values):6}  p50 {statistics.median(values) * 1000:8.2f} ms  "
+                  f"p99 {p99 * 1000:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
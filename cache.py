@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from coordination import get_backend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = float(os.getenv('RESPONSE_CACHE_TTL', '60'))
+DEFAULT_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+SHARED_CACHE = os.getenv('RESPONSE_CACHE_SHARED', 'true').lower() == 'true'
+
+# How often the shared data version is re-read, in seconds
+VERSION_CHECK_INTERVAL = 1.0
+
+# Name of the shared counter bumped whenever articles change
+DATA_VERSION_COUNTER = 'data_version'
+
+class ResponseCache:
+    """TTL + LRU cache of serialized responses with a memory budget
+
+    Entries are tagged with the data version current when they were stored.
+    Ingestion and deletes bump the version, which makes every older entry stale.
+    When the total size of the cached bodies exceeds max_bytes, the least recently
+    used entries are evicted.
+    
+    With shared=True the version lives in the coordination backend and bodies are
+    also written there, so gunicorn workers see each other's invalidations and
+    can reuse responses another worker already built.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES,
+                 shared: bool = SHARED_CACHE):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.version = 0
+        self._version_checked = 0.0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, key: str):
+        _, _, body = self._entries.pop(key)
+        self._size -= len(body)
+
+    def _set_version(self, version: int):
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self.invalidations += 1
+                self._entries.clear()
+                self._size = 0
+
+    def _version_check_due(self) -> bool:
+        """Whether to re-read the shared version now; marks it as checked"""
+        now = time.monotonic()
+        if not self.shared or now - self._version_checked < VERSION_CHECK_INTERVAL:
+            return False
+        self._version_checked = now
+        return True
+
+    def _read_shared_version(self):
+        """Pick up version bumps made by other processes"""
+        try:
+            self._set_version(get_backend().get_counter(DATA_VERSION_COUNTER))
+        except Exception as e:
+            logger.warning(f"Could not read shared cache version: {e}")
+
+    def _get_local(self, key: str) -> Tuple[Optional[bytes], int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, version, body = entry
+                if version == self.version and expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body, version
+                self._drop(key)
+            return None, self.version
+
+    def _get_shared(self, key: str, version: int) -> Optional[bytes]:
+        try:
+            body = get_backend().cache_get(f"{version}:{key}")
+        except Exception as e:
+            logger.warning(f"Could not read shared cache: {e}")
+            return None
+        if body is not None:
+            self._store_local(key, body, version)
+            with self._lock:
+                self.hits += 1
+                self.shared_hits += 1
+        return body
+
+    def _set_shared(self, key: str, body: bytes, version: int):
+        try:
+            get_backend().cache_set(f"{version}:{key}", body, self.ttl)
+        except Exception as e:
+            logger.warning(f"Could not write shared cache: {e}")
+
+    async def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        """Cached body for key (None if missing, expired or stale) and the data version looked up
+
+        Pass the version to set() along with the body built on a miss, so a
+        bump in between cannot file data read before it under the new version.
+        Local hits are served on the event loop; the coordination backend,
+        which may wait on other workers' writes, is read in a worker thread.
+        """
+        if self._version_check_due():
+            await asyncio.to_thread(self._read_shared_version)
+        body, version = self._get_local(key)
+        if body is None and self.shared:
+            body = await asyncio.to_thread(self._get_shared, key, version)
+        if body is None:
+            with self._lock:
+                self.misses += 1
+        return body, version
+
+    async def set(self, key: str, body: bytes, version: int):
+        """Store a body built at the given data version, evicting least recently used entries to stay in budget"""
+        self._store_local(key, body, version)
+        if self.shared:
+            await asyncio.to_thread(self._set_shared, key, body, version)
+
+    def _store_local(self, key: str, body: bytes, version: int):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, version, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def bump_version(self):
+        """Invalidate everything cached so far; called after data changes"""
+        version = self.version + 1
+        if self.shared:
+            try:
+                version = get_backend().incr_counter(DATA_VERSION_COUNTER)
+                self._version_checked = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Could not bump shared cache version: {e}")
+        self._set_version(version)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'data_version': self.version,
+                'shared': self.shared,
+            }
+
+# Shared by the API endpoints and the ingestion path in this process
+response_cache = ResponseCache()
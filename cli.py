@@ -8,52 +8,53 @@ import argparse
 import sys
 import json
 from datetime import datetime
-from scraper import VnExpressScraper
-from database import SessionLocal, NewsArticle
+from scraper import VnExpressScraper, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
+from database import SessionLocal, ReadSessionLocal, NewsArticle, engine
+from export import (
+    COMPRESSIONS, append_snapshot, compression_for, export_query, format_watermark, open_output,
+    stream_rows, write_json_array, write_jsonl
+)
+from ingestion import ingest_articles, KnownUrls
+from pipeline import ScrapePipeline, DEFAULT_PARSE_WORKERS, DEFAULT_QUEUE_SIZE, DEFAULT_WRITE_BATCH_SIZE
+from scheduler import SCHEDULED_CATEGORIES, scheduler
+from slugs import category_slug
+from stats import category_counts_query, rebuild_stats, totals_query
+from retry_queue import RetryQueue
+from migrations import LATEST_VERSION, run_migrations, schema_version, verify_query_plans
 
 def scrape_command(args):
     """Scrape news articles"""
-    scraper = VnExpressScraper()
+    scraper = VnExpressScraper(requests_per_second=args.rps, max_workers=args.workers)
     
     print(f"Starting scraping...")
     print(f"Category: {args.category or 'All'}")
     print(f"Limit: {args.limit}")
+    print(f"Mode: {'concurrent' if args.concurrent else 'sequential'}")
+    
+    if args.save:
+        # Only fetch articles that are not stored yet
+        scraper.known_urls = KnownUrls.load()
+        print(f"Loaded {len(scraper.known_urls)} stored URLs to skip")
+        # Queue transient failures for the scheduler to retry
+        scraper.retry_queue = RetryQueue()
     
     # Scrape articles
-    articles = scraper.scrape_multiple_articles(args.category, args.limit)
+    started = datetime.now()
+    articles = scraper.scrape_multiple_articles(args.category, args.limit, concurrent=args.concurrent)
+    print(f"Fetched {len(articles)} articles in {(datetime.now() - started).total_seconds():.1f}s")
+    if scraper.http_cache:
+        stats = scraper.http_cache.stats_dict()
+        print(f"Listing cache: {stats['not_modified']} not modified, {stats['unchanged']} unchanged, "
+              f"{stats['bytes_saved']} bytes saved, {stats['parses_avoided']} parses avoided")
+    print_request_stats(scraper)
     
     if args.save:
         # Save to database
         db = SessionLocal()
-        saved_count = 0
-        
-        for article_data in articles:
-            # Check if article already exists
-            existing_article = db.query(NewsArticle).filter(
-                NewsArticle.url == article_data['url']
-            ).first()
-            
-            if not existing_article:
-                # Create new article
-                db_article = NewsArticle(
-                    title=article_data.get('title', ''),
-                    content=article_data.get('content', ''),
-                    summary=article_data.get('summary', ''),
-                    author=article_data.get('author', ''),
-                    category=article_data.get('category', ''),
-                    url=article_data['url'],
-                    image_url=article_data.get('image_url', ''),
-                    published_date=article_data.get('published_date'),
-                    tags=json.dumps(article_data.get('tags', []), ensure_ascii=False)
-                )
-                
-                db.add(db_article)
-                saved_count += 1
-        
-        db.commit()
+        result = ingest_articles(db, articles, known_urls=scraper.known_urls)
         db.close()
         
-        print(f"Saved {saved_count} new articles to database")
+        print(f"Saved {result.inserted} new articles to database ({result.skipped} already stored)")
     
     if args.output:
         # Save to JSON file
@@ -63,6 +64,40 @@ def scrape_command(args):
     
     print(f"Scraped {len(articles)} articles")
 
+def crawl_command(args):
+    """Crawl several categories with the fetch/parse/write pipeline"""
+    scraper = VnExpressScraper(requests_per_second=args.rps, max_workers=args.fetch_workers)
+    
+    scraper.known_urls = KnownUrls.load()
+    scraper.retry_queue = RetryQueue()
+    
+    categories = args.categories or SCHEDULED_CATEGORIES
+    print(f"Crawling {len(categories)} categories, up to {args.limit} new articles each")
+    print(f"Fetch workers: {args.fetch_workers}, parse workers: {args.parse_workers}, queue size: {args.queue_size}")
+    
+    pipeline = ScrapePipeline(
+        scraper,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        queue_size=args.queue_size,
+        write_batch_size=args.batch_size
+    )
+    started = datetime.now()
+    result = pipeline.run(categories, args.limit)
+    
+    print(f"Discovered {result.discovered}, fetched {result.fetched}, parsed {result.parsed}, failed {result.failed}")
+    print(f"Saved {result.inserted} new articles to database ({result.skipped} already stored) "
+          f"in {(datetime.now() - started).total_seconds():.1f}s")
+    print_request_stats(scraper)
+
+def print_request_stats(scraper):
+    """Retries and circuit breaker activity of a run, with each host's concurrency limit"""
+    stats = scraper.controller.stats_dict()
+    print(f"Requests: {stats['requests']} sent, {stats['retries']} retried, {stats['failures']} failed, "
+          f"{stats['rejected']} rejected by an open circuit")
+    for host, state in stats['hosts'].items():
+        print(f"  {host}: concurrency limit {state['concurrency_limit']}, circuit {state['circuit']}")
+
 def list_command(args):
     """List articles from database"""
     db = SessionLocal()
@@ -70,7 +105,7 @@ def list_command(args):
     query = db.query(NewsArticle).filter(NewsArticle.is_active == True)
     
     if args.category:
-        query = query.filter(NewsArticle.category.ilike(f"%{args.category}%"))
+        query = query.filter(NewsArticle.category_slug == category_slug(args.category))
     
     articles = query.order_by(NewsArticle.scraped_date.desc()).limit(args.limit).all()
     
@@ -92,17 +127,16 @@ def stats_command(args):
     """Show statistics"""
     db = SessionLocal()
     
-    total_articles = db.query(NewsArticle).count()
-    active_articles = db.query(NewsArticle).filter(NewsArticle.is_active == True).count()
+    if args.rebuild:
+        rebuild_stats(db)
+        db.commit()
+        print("Rebuilt the stats rollups from the articles table")
+        print()
+    
+    total_articles, active_articles = db.execute(totals_query()).one()
     
     # Category statistics
-    from sqlalchemy import func
-    category_stats = db.query(
-        NewsArticle.category,
-        func.count(NewsArticle.id).label('count')
-    ).filter(
-        NewsArticle.is_active == True
-    ).group_by(NewsArticle.category).all()
+    category_stats = db.execute(category_counts_query()).all()
     
     print("=== VnExpress News Scraper Statistics ===")
     print(f"Total articles: {total_articles}")
@@ -125,42 +159,82 @@ def categories_command(args):
         print(f"{slug:15} - {name}")
 
 def export_command(args):
-    """Export articles to JSON"""
-    db = SessionLocal()
+    """Export articles to JSON or JSON Lines, streaming rows from the database"""
+    compression = args.compress or compression_for(args.output)
+    fmt = args.format or ('jsonl' if '.jsonl' in args.output else 'json')
     
-    query = db.query(NewsArticle).filter(NewsArticle.is_active == True)
+    try:
+        query = export_query(args.category, args.since)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     
-    if args.category:
-        query = query.filter(NewsArticle.category.ilike(f"%{args.category}%"))
+    db = ReadSessionLocal()
+    try:
+        with open_output(args.output, compression) as out:
+            write = write_jsonl if fmt == 'jsonl' else write_json_array
+            count, last = write(stream_rows(db, query), out)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
     
-    articles = query.all()
+    print(f"Exported {count} articles to {args.output}")
+    if last is not None:
+        print(f"Next incremental export: --since {format_watermark(last)}")
+
+def snapshot_command(args):
+    """Append new articles to a date-partitioned Parquet snapshot"""
+    db = ReadSessionLocal()
+    try:
+        count, watermark = append_snapshot(db, args.output)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
     
-    # Convert to dict
-    articles_data = []
-    for article in articles:
-        article_dict = {
-            'id': article.id,
-            'title': article.title,
-            'content': article.content,
-            'summary': article.summary,
-            'author': article.author,
-            'category': article.category,
-            'url': article.url,
-            'image_url': article.image_url,
-            'published_date': article.published_date.isoformat() if article.published_date else None,
-            'scraped_date': article.scraped_date.isoformat(),
-            'view_count': article.view_count,
-            'tags': article.tags
-        }
-        articles_data.append(article_dict)
-    
-    # Save to file
-    with open(args.output, 'w', encoding='utf-8') as f:
-        json.dump(articles_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Exported {len(articles_data)} articles to {args.output}")
+    print(f"Appended {count} articles to {args.output}")
+    if watermark:
+        print(f"Snapshot is current up to {watermark}")
+
+def frontier_command(args):
+    """Show the scheduler's crawl frontier, optionally polling the due categories first"""
+    if args.poll:
+        scheduler.scheduled_scrape()
     
-    db.close()
+    states = {state.category: state for state in scheduler.frontier.states()}
+    due = set(scheduler.frontier.due(SCHEDULED_CATEGORIES))
+    print(f"{'Category':<14} {'Watermark':>10} {'Per hour':>9} {'Interval':>9}  Next poll")
+    for category in SCHEDULED_CATEGORIES:
+        state = states.get(category)
+        if state is None:
+            print(f"{category or 'homepage':<14} {'-':>10} {'-':>9} {'-':>9}  due (never polled)")
+            continue
+        rate = f"{state.articles_per_hour:.1f}" if state.articles_per_hour is not None else '-'
+        next_poll = 'due' if category in due else f"{state.next_crawl_at:%Y-%m-%d %H:%M} UTC"
+        print(f"{category or 'homepage':<14} {state.watermark or '-':>10} {rate:>9} "
+              f"{state.interval_minutes:>7.0f} m  {next_poll}")
+    print(f"Retry queue: {len(scheduler.retry_queue)} articles waiting")
+
+def migrate_command(args):
+    """Apply pending schema migrations and check the hot queries use their indexes"""
+    for migration in run_migrations(engine):
+        print(f"Applied migration {migration.version}: {migration.description}")
+    print(f"Schema version {schema_version(engine)} (latest {LATEST_VERSION})")
+    
+    if args.check:
+        failed = 0
+        for result in verify_query_plans(engine):
+            print(f"{'OK  ' if result.ok else 'FAIL'} {result.check.description} (expects {result.check.index})")
+            if not result.ok or args.verbose:
+                for line in result.plan:
+                    print(f"       {line}")
+            failed += not result.ok
+        if failed:
+            print(f"{failed} queries do not use their index")
+            sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser(description='VnExpress News Scraper CLI')
@@ -172,6 +246,19 @@ def main():
     scrape_parser.add_argument('--limit', '-l', type=int, default=20, help='Number of articles to scrape')
     scrape_parser.add_argument('--save', '-s', action='store_true', help='Save to database')
     scrape_parser.add_argument('--output', '-o', help='Output JSON file')
+    scrape_parser.add_argument('--concurrent', action='store_true', help='Fetch articles with a worker pool instead of one by one')
+    scrape_parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, help='Worker pool size for concurrent mode')
+    scrape_parser.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND, help='Max requests per second per host in concurrent mode')
+    
+    # Crawl command
+    crawl_parser = subparsers.add_parser('crawl', help='Crawl categories with the fetch/parse/write pipeline and save to database')
+    crawl_parser.add_argument('categories', nargs='*', help='Categories to crawl (default: scheduler categories; use "" for homepage)')
+    crawl_parser.add_argument('--limit', '-l', type=int, default=15, help='New articles per category')
+    crawl_parser.add_argument('--fetch-workers', type=int, default=DEFAULT_MAX_WORKERS, help='Fetcher threads')
+    crawl_parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS, help='Parser processes')
+    crawl_parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='Max pages waiting between stages')
+    crawl_parser.add_argument('--batch-size', type=int, default=DEFAULT_WRITE_BATCH_SIZE, help='Articles per database write')
+    crawl_parser.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND, help='Max requests per second per host')
     
     # List command
     list_parser = subparsers.add_parser('list', help='List articles from database')
@@ -180,19 +267,38 @@ def main():
     
     # Stats command
     stats_parser = subparsers.add_parser('stats', help='Show statistics')
+    stats_parser.add_argument('--rebuild', action='store_true', help='Recount the stats rollups from the articles table first')
     
     # Categories command
     categories_parser = subparsers.add_parser('categories', help='List available categories')
     
     # Export command
-    export_parser = subparsers.add_parser('export', help='Export articles to JSON')
+    export_parser = subparsers.add_parser('export', help='Export articles to JSON or JSON Lines')
     export_parser.add_argument('--category', '-c', help='Filter by category')
-    export_parser.add_argument('--output', '-o', required=True, help='Output JSON file')
+    export_parser.add_argument('--output', '-o', required=True, help='Output file (.json, .jsonl, optionally .gz/.zst)')
+    export_parser.add_argument('--format', '-f', choices=['json', 'jsonl'], help='Output format (default: from file name, else json)')
+    export_parser.add_argument('--compress', choices=COMPRESSIONS, help='Compression (default: from file name)')
+    export_parser.add_argument('--since', help='Only articles scraped after this watermark (ISO date[,id], printed by the last export)')
+    
+    # Snapshot command
+    snapshot_parser = subparsers.add_parser('snapshot', help='Append new articles to a Parquet snapshot partitioned by publish date')
+    snapshot_parser.add_argument('--output', '-o', default='./snapshot', help='Snapshot directory')
+    
+    # Frontier command
+    frontier_parser = subparsers.add_parser('frontier', help="Show each scheduled category's watermark and polling interval")
+    frontier_parser.add_argument('--poll', action='store_true', help='Crawl the due categories now, as the scheduler would')
+    
+    # Migrate command
+    migrate_parser = subparsers.add_parser('migrate', help='Apply schema migrations (also done on startup)')
+    migrate_parser.add_argument('--check', action='store_true', help='Verify query plans with EXPLAIN QUERY PLAN')
+    migrate_parser.add_argument('--verbose', '-v', action='store_true', help='Print every query plan')
     
     args = parser.parse_args()
     
     if args.command == 'scrape':
         scrape_command(args)
+    elif args.command == 'crawl':
+        crawl_command(args)
     elif args.command == 'list':
         list_command(args)
     elif args.command == 'stats':
@@ -201,6 +307,12 @@ def main():
         categories_command(args)
     elif args.command == 'export':
         export_command(args)
+    elif args.command == 'snapshot':
+        snapshot_command(args)
+    elif args.command == 'frontier':
+        frontier_command(args)
+    elif args.command == 'migrate':
+        migrate_command(args)
     else:
         parser.print_help()
 
@@ -0,0 +1,168 @@
+import os
+import socket
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Optional
+
+COORDINATION_BACKEND = os.getenv('COORDINATION_BACKEND', 'sqlite')
+COORDINATION_URL = os.getenv('COORDINATION_URL', './coordination.db')
+
+def owner_id() -> str:
+    """Identifies this process as a lock owner (computed per call, so forked workers differ)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class CoordinationBackend(ABC):
+    """Locks, a shared response cache and counters visible to every worker process"""
+
+    @abstractmethod
+    def acquire_lock(self, name: str, ttl: float) -> bool:
+        """Take or renew a named lock for ttl seconds; False if another owner holds it"""
+
+    @abstractmethod
+    def release_lock(self, name: str):
+        """Release a lock held by this process"""
+
+    @abstractmethod
+    def cache_get(self, key: str) -> Optional[bytes]:
+        """Shared cached value, or None if missing or expired"""
+
+    @abstractmethod
+    def cache_set(self, key: str, value: bytes, ttl: float):
+        """Store a shared cached value for ttl seconds"""
+
+    @abstractmethod
+    def get_counter(self, name: str) -> int:
+        """Current value of a shared counter (0 if never incremented)"""
+
+    @abstractmethod
+    def incr_counter(self, name: str) -> int:
+        """Atomically increment a shared counter and return the new value"""
+
+class SQLiteBackend(CoordinationBackend):
+    """Default backend: a small SQLite file shared by the workers on one host"""
+
+    # Expired cache rows are purged on roughly one write in this many
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str = './coordination.db'):
+        self.path = path
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        return closing(conn)
+
+    def acquire_lock(self, name: str, ttl: float) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT owner, expires_at FROM locks WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner_id() and row[1] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT OR REPLACE INTO locks (name, owner, expires_at) VALUES (?, ?, ?)",
+                         (name, owner_id(), now + ttl))
+            conn.execute("COMMIT")
+            return True
+
+    def release_lock(self, name: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner_id()))
+
+    def cache_get(self, key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                               (key, time.time())).fetchone()
+        return bytes(row[0]) if row else None
+
+    def cache_set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, value, now + ttl))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def get_counter(self, name: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def incr_counter(self, name: str) -> int:
+        with self._connect() as conn:
+            # Hold the write lock across both statements, so no other worker's
+            # increment lands between the update and the read
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                         "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+            value = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+            conn.execute("COMMIT")
+            return value
+
+class RedisBackend(CoordinationBackend):
+    """Backend for workers spread over several hosts; needs the redis package"""
+
+    # Delete the lock only if this process still owns it
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    # Take the lock if it is free or already ours, and set its expiry
+    ACQUIRE_SCRIPT = """
+        local owner = redis.call('get', KEYS[1])
+        if owner and owner ~= ARGV[1] then return 0 end
+        redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+        return 1
+    """
+
+    def __init__(self, url: str, prefix: str = 'vnexpress:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("COORDINATION_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._acquire = self.client.register_script(self.ACQUIRE_SCRIPT)
+        self._release = self.client.register_script(self.RELEASE_SCRIPT)
+
+    def acquire_lock(self, name: str, ttl: float) -> bool:
+        return bool(self._acquire(keys=[f"{self.prefix}lock:{name}"], args=[owner_id(), int(ttl * 1000)]))
+
+    def release_lock(self, name: str):
+        self._release(keys=[f"{self.prefix}lock:{name}"], args=[owner_id()])
+
+    def cache_get(self, key: str) -> Optional[bytes]:
+        return self.client.get(f"{self.prefix}cache:{key}")
+
+    def cache_set(self, key: str, value: bytes, ttl: float):
+        self.client.set(f"{self.prefix}cache:{key}", value, px=int(ttl * 1000))
+
+    def get_counter(self, name: str) -> int:
+        return int(self.client.get(f"{self.prefix}counter:{name}") or 0)
+
+    def incr_counter(self, name: str) -> int:
+        return self.client.incr(f"{self.prefix}counter:{name}")
+
+def create_backend(kind: str = COORDINATION_BACKEND, url: str = COORDINATION_URL) -> CoordinationBackend:
+    """Build the backend selected by COORDINATION_BACKEND / COORDINATION_URL"""
+    if kind == 'sqlite':
+        return SQLiteBackend(url)
+    if kind == 'redis':
+        return RedisBackend(url)
+    raise ValueError(f"Unknown coordination backend '{kind}', expected 'sqlite' or 'redis'")
+
+_backend: Optional[CoordinationBackend] = None
+
+def get_backend() -> CoordinationBackend:
+    """Process-wide backend, created on first use (after gunicorn forks the workers)"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
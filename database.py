@@ -1,12 +1,79 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import create_engine, event, Column, ForeignKey, Float, Integer, String, Text, DateTime, Boolean, Index, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from datetime import datetime
+import os
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./vnexpress_news.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./vnexpress_news.db")
+
+# "tuned" enables WAL and the pragmas below, a single writer connection and a
+# separate read-only pool; "default" keeps SQLite's stock settings and one pool
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB, i.e. 64 MiB
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": "MEMORY",
+}
+READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+def apply_pragmas(engine, read_only: bool = False):
+    """Set the tuning pragmas on every new connection of an engine"""
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+if SQLITE_PROFILE == "tuned":
+    # One connection per process: writers queue on the pool instead of
+    # contending for SQLite's write lock
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=60
+    )
+    apply_pragmas(engine)
+    read_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=READ_POOL_SIZE,
+        max_overflow=READ_POOL_SIZE
+    )
+    apply_pragmas(read_engine, read_only=True)
+else:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+    read_engine = engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def async_database_url(url: str) -> str:
+    """Same database through the aiosqlite driver"""
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1) if url.startswith("sqlite://") else url
+
+# Read engine for the async API endpoints: aiosqlite runs each connection in
+# its own thread, so queries no longer block the event loop
+async_read_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=READ_POOL_SIZE,
+    max_overflow=READ_POOL_SIZE
+)
+if SQLITE_PROFILE == "tuned":
+    apply_pragmas(async_read_engine.sync_engine, read_only=True)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False)
 Base = declarative_base()
 
 class NewsArticle(Base):
@@ -25,13 +92,141 @@ class NewsArticle(Base):
     is_active = Column(Boolean, default=True)
     view_count = Column(Integer, default=0)
     tags = Column(String, nullable=True)  # JSON string of tags
+    category_slug = Column(String, nullable=True)  # slugs.category_slug(category), filtered on exactly
+    
+    # Partial indexes over active rows, the only ones listings read; a query
+    # uses them when its WHERE clause contains is_active = 1. New indexes also
+    # need a step in migrations.py to reach existing databases.
+    __table_args__ = (
+        # ORDER BY published_date DESC, id DESC and cursor seeks on it
+        Index('ix_news_articles_active_published', 'published_date', 'id',
+              sqlite_where=text('is_active = 1')),
+        # The same order within one category
+        Index('ix_news_articles_active_category', 'category_slug', 'published_date', 'id',
+              sqlite_where=text('is_active = 1')),
+        # Recent counts, the CLI listing and incremental exports in (scraped_date, id) order
+        Index('ix_news_articles_active_scraped', 'scraped_date', 'id',
+              sqlite_where=text('is_active = 1')),
+    )
+
+class Tag(Base):
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)  # as first seen on the site
+    slug = Column(String, unique=True, nullable=False)  # slugs.slugify(name), used in URLs
+
+class ArticleTag(Base):
+    __tablename__ = "article_tags"
+    
+    # The primary key serves "tags of an article"; the index "articles with a tag"
+    article_id = Column(Integer, ForeignKey("news_articles.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index('ix_article_tags_tag_id_article_id', 'tag_id', 'article_id'),
+    )
+
+# Article counts rolled up by category and by scraped hour, kept current by
+# stats.py on ingest and soft delete so statistics never scan news_articles.
+# total counts every stored article, active the ones not soft deleted.
+class CategoryStats(Base):
+    __tablename__ = "category_stats"
+    
+    category = Column(String, primary_key=True)  # '' for articles without one
+    category_slug = Column(String, nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    active = Column(Integer, nullable=False, default=0)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+class HourlyStats(Base):
+    __tablename__ = "hourly_stats"
+    
+    hour = Column(DateTime, primary_key=True)  # scraped_date truncated to the hour
+    category_slug = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    active = Column(Integer, nullable=False, default=0)
+
+class CrawlState(Base):
+    __tablename__ = "crawl_frontier"
+    
+    # Where the scheduler's crawl of a listing got to (see frontier.py)
+    category = Column(String, primary_key=True)  # '' for the homepage
+    watermark = Column(Integer, nullable=True)  # newest article number seen, from the -<n>.html URL suffix
+    articles_per_hour = Column(Float, nullable=True)  # smoothed publishing rate
+    interval_minutes = Column(Float, nullable=False)
+    last_crawled_at = Column(DateTime, nullable=True)
+    next_crawl_at = Column(DateTime, nullable=True)
+
+class RetryItem(Base):
+    __tablename__ = "retry_queue"
+
+    # Article that failed with a transient error and is fetched again later (see retry_queue.py)
+    url = Column(String, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    first_failed_at = Column(DateTime, nullable=False)
+    last_failed_at = Column(DateTime, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False, index=True)
+
+# Full-text index over title, summary and content. unicode61 with
+# remove_diacritics 2 folds Vietnamese tone and vowel marks ("Thời sự" is indexed
+# as "thoi su"); đ is not a diacritic to SQLite, so search.py expands d/đ in queries.
+# Triggers keep the external-content index in sync with news_articles.
+FTS_TABLE = "news_articles_fts"
+
+FTS_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, summary, content,
+        content='news_articles', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER news_articles_fts_insert AFTER INSERT ON news_articles BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+    f"""CREATE TRIGGER news_articles_fts_delete AFTER DELETE ON news_articles BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+    END""",
+    f"""CREATE TRIGGER news_articles_fts_update AFTER UPDATE OF title, summary, content ON news_articles BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+    # Index the rows that existed before the table was created
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+def init_db():
+    """Create missing tables, then bring an existing database up to date"""
+    from migrations import run_migrations  # imports the models above
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    # Close the connections this used: with preload_app the gunicorn master runs
+    # it, and forked workers must open their own instead of sharing its handles
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+
+init_db()
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Session on the read-only pool, for endpoints that do not write"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """Async session on the read-only pool, for async endpoints that do not write"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,311 @@
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime, time
+from typing import Dict, IO, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from database import NewsArticle
+from slugs import category_slug
+from tags import parse_tags
+
+# Rows fetched from SQLite per round trip while streaming
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    NewsArticle.id,
+    NewsArticle.title,
+    NewsArticle.content,
+    NewsArticle.summary,
+    NewsArticle.author,
+    NewsArticle.category,
+    NewsArticle.url,
+    NewsArticle.image_url,
+    NewsArticle.published_date,
+    NewsArticle.scraped_date,
+    NewsArticle.view_count,
+    NewsArticle.tags,
+)
+
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+
+def export_row(row) -> Dict:
+    """JSON-ready dict for a row of EXPORT_COLUMNS"""
+    fields = dict(row._mapping)
+    for name in ('published_date', 'scraped_date'):
+        if fields[name] is not None:
+            fields[name] = fields[name].isoformat()
+    return fields
+
+def format_watermark(row) -> str:
+    """Watermark pointing just after a row, for the next incremental export"""
+    return f"{row.scraped_date.isoformat()},{row.id}"
+
+def parse_watermark(since: str) -> Tuple[datetime, Optional[int]]:
+    """Inverse of format_watermark; a bare ISO date also works"""
+    try:
+        scraped, _, article_id = since.partition(',')
+        return datetime.fromisoformat(scraped), int(article_id) if article_id else None
+    except ValueError:
+        raise ValueError(f"Invalid watermark '{since}', expected ISO date[,id]")
+
+def as_datetime(value: Union[date, datetime]) -> datetime:
+    """A date as midnight of that day; datetimes pass through"""
+    return value if isinstance(value, datetime) else datetime.combine(value, time.min)
+
+def export_query(category: Optional[str] = None, since: Optional[str] = None,
+                 published_from: Optional[Union[date, datetime]] = None,
+                 published_to: Optional[Union[date, datetime]] = None):
+    """Active articles in (scraped_date, id) order, optionally after a watermark
+
+    ingest_articles stamps scraped_date while it holds the write lock, so rows
+    committed after a watermark was taken always sort after it.
+    """
+    query = select(*EXPORT_COLUMNS).where(NewsArticle.is_active == True)
+    if category:
+        query = query.where(NewsArticle.category_slug == category_slug(category))
+    if published_from:
+        query = query.where(NewsArticle.published_date >= as_datetime(published_from))
+    if published_to:
+        query = query.where(NewsArticle.published_date < as_datetime(published_to))
+    if since:
+        scraped, article_id = parse_watermark(since)
+        if article_id is None:
+            query = query.where(NewsArticle.scraped_date > scraped)
+        else:
+            query = query.where(or_(
+                NewsArticle.scraped_date > scraped,
+                and_(NewsArticle.scraped_date == scraped, NewsArticle.id > article_id)
+            ))
+    return query.order_by(NewsArticle.scraped_date, NewsArticle.id)
+
+def stream_rows(db: Session, query, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator:
+    """Rows of a query, fetched chunk_size at a time instead of all at once"""
+    return db.execute(query.execution_options(yield_per=chunk_size))
+
+def open_output(path: str, compression: str = 'none') -> IO[str]:
+    """Text stream writing to path, compressed with gzip or zstd if asked"""
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires the 'zstandard' package (pip install zstandard)")
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+def compression_for(path: str) -> str:
+    """Compression implied by a file name (.gz, .zst)"""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return 'none'
+
+def write_jsonl(rows: Iterator, out: IO[str]):
+    """One JSON object per line; returns (count, last row)"""
+    count, last = 0, None
+    for row in rows:
+        out.write(json.dumps(export_row(row), ensure_ascii=False))
+        out.write('\n')
+        count, last = count + 1, row
+    return count, last
+
+def write_json_array(rows: Iterator, out: IO[str]):
+    """An indented JSON array written element by element; returns (count, last row)"""
+    count, last = 0, None
+    out.write('[')
+    for row in rows:
+        item = json.dumps(export_row(row), ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        out.write(('\n  ' if count == 0 else ',\n  ') + item)
+        count, last = count + 1, row
+    out.write('\n]' if count else ']')
+    return count, last
+
+def require_pyarrow():
+    """Import pyarrow and pyarrow.parquet, which Parquet output needs"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet output requires the 'pyarrow' package (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+def parquet_schema(pa):
+    """Arrow schema of exported articles; tags become a list column"""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('title', pa.string()),
+        ('content', pa.string()),
+        ('summary', pa.string()),
+        ('author', pa.string()),
+        ('category', pa.string()),
+        ('url', pa.string()),
+        ('image_url', pa.string()),
+        ('published_date', pa.timestamp('us')),
+        ('scraped_date', pa.timestamp('us')),
+        ('view_count', pa.int64()),
+        ('tags', pa.list_(pa.string())),
+    ])
+
+def arrow_table(pa, schema, rows: Sequence):
+    """Arrow table from rows of EXPORT_COLUMNS"""
+    records = []
+    for row in rows:
+        record = dict(row._mapping)
+        record['tags'] = parse_tags(record['tags'])
+        records.append(record)
+    return pa.Table.from_pylist(records, schema=schema)
+
+class _ChunkSink:
+    """Write-only file object whose bytes are drained after every write"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class NdjsonEncoder:
+    """Chunks of rows as newline-delimited JSON"""
+    media_type = 'application/x-ndjson'
+
+    def begin(self) -> bytes:
+        return b''
+
+    def encode(self, rows: Sequence) -> bytes:
+        return ''.join(json.dumps(export_row(row), ensure_ascii=False) + '\n' for row in rows).encode('utf-8')
+
+    def end(self) -> bytes:
+        return b''
+
+class CsvEncoder:
+    """Chunks of rows as CSV with a header line"""
+    media_type = 'text/csv'
+
+    def begin(self) -> bytes:
+        return self._lines([[column.key for column in EXPORT_COLUMNS]])
+
+    def encode(self, rows: Sequence) -> bytes:
+        return self._lines([list(export_row(row).values()) for row in rows])
+
+    def end(self) -> bytes:
+        return b''
+
+    def _lines(self, rows: List[list]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+class ParquetEncoder:
+    """Chunks of rows as Parquet row groups; the footer is written by end()"""
+    media_type = 'application/vnd.apache.parquet'
+
+    def __init__(self):
+        self.pa, pq = require_pyarrow()
+        self.schema = parquet_schema(self.pa)
+        self.sink = _ChunkSink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression='zstd')
+
+    def begin(self) -> bytes:
+        return self.sink.drain()
+
+    def encode(self, rows: Sequence) -> bytes:
+        self.writer.write_table(arrow_table(self.pa, self.schema, rows))
+        return self.sink.drain()
+
+    def end(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+EXPORT_ENCODERS = {
+    'ndjson': NdjsonEncoder,
+    'csv': CsvEncoder,
+    'parquet': ParquetEncoder,
+}
+
+# Snapshot files live in hive-style published_day=YYYY-MM-DD directories; the
+# watermark of the last appended row is kept next to them (files starting with
+# an underscore are ignored by dataset readers)
+SNAPSHOT_WATERMARK_FILE = '_watermark'
+
+def snapshot_partitioning(pa, ds):
+    """Hive partitioning on the day an article was published"""
+    return ds.partitioning(pa.schema([('published_day', pa.date32())]), flavor='hive')
+
+def open_snapshot(directory: str):
+    """The snapshot as a pyarrow dataset; read only the columns a query needs"""
+    pa, _ = require_pyarrow()
+    import pyarrow.dataset as ds
+    return ds.dataset(directory, format='parquet', partitioning=snapshot_partitioning(pa, ds))
+
+def append_snapshot(db: Session, directory: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Tuple[int, Optional[str]]:
+    """Append articles scraped since the last run to a date-partitioned Parquet snapshot
+
+    Returns the number of rows appended and the new watermark. Rows already in
+    the snapshot are not rewritten, so later soft deletes and view counts are
+    not reflected; delete the directory to rebuild it from scratch.
+    """
+    pa, _ = require_pyarrow()
+    import pyarrow.dataset as ds
+
+    os.makedirs(directory, exist_ok=True)
+    watermark_path = os.path.join(directory, SNAPSHOT_WATERMARK_FILE)
+    since = None
+    if os.path.exists(watermark_path):
+        with open(watermark_path, encoding='utf-8') as f:
+            since = f.read().strip() or None
+
+    schema = parquet_schema(pa).append(pa.field('published_day', pa.date32()))
+    state = {'count': 0, 'last': None}
+
+    def batches():
+        for rows in stream_rows(db, export_query(since=since), chunk_size).partitions():
+            table = arrow_table(pa, parquet_schema(pa), rows)
+            days = [row.published_date.date() if row.published_date else None for row in rows]
+            table = table.append_column('published_day', pa.array(days, pa.date32()))
+            state['count'] += len(rows)
+            state['last'] = rows[-1]
+            yield from table.to_batches()
+
+    # A run-specific file name appends new files instead of replacing old ones
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    ds.write_dataset(
+        batches(), directory, schema=schema, format='parquet',
+        partitioning=snapshot_partitioning(pa, ds),
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd')
+    )
+
+    if state['last'] is None:
+        return 0, since
+    watermark = format_watermark(state['last'])
+    with open(watermark_path, 'w', encoding='utf-8') as f:
+        f.write(watermark)
+    return state['count'], watermark
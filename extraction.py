@@ -0,0 +1,223 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from parsers import create_parser
+from slugs import CATEGORY_NAMES
+
+class ArticleExtractor:
+    """Turns downloaded article pages into article dicts
+    
+    The parsing half of VnExpressScraper, without a session or any database
+    access, so parser processes can build one cheaply.
+    """
+    
+    def __init__(self, base_url: str = "https://vnexpress.net", parser: str = 'lxml'):
+        self.base_url = base_url.rstrip('/')
+        
+        # Article parser backend; listing pages use BeautifulSoup on the matching tree builder
+        self.parser_backend = parser
+        self.parser = create_parser(self, parser)
+        self.soup_features = 'lxml' if parser == 'lxml' else 'html.parser'
+        
+        # Category mappings
+        self.categories = CATEGORY_NAMES
+    
+    def parse_article(self, url: str, content: bytes) -> Dict:
+        """Extract article data from a downloaded article page"""
+        return self.parser.parse(url, content)
+    
+    def extract_title(self, soup: BeautifulSoup) -> str:
+        """Extract article title"""
+        title_selectors = [
+            'h1.title-detail',
+            'h1.title_news_detail',
+            'h1.title-news',
+            'h1',
+            '.title-detail',
+            '.title_news_detail'
+        ]
+        
+        for selector in title_selectors:
+            title_tag = soup.select_one(selector)
+            if title_tag:
+                return title_tag.get_text(strip=True)
+        
+        return ""
+    
+    def extract_content(self, soup: BeautifulSoup) -> str:
+        """Extract article content"""
+        content_selectors = [
+            '.fck_detail',
+            '.Normal',
+            'article .content-detail',
+            '.content_detail',
+            '.article-content'
+        ]
+        
+        for selector in content_selectors:
+            content_div = soup.select_one(selector)
+            if content_div:
+                # Remove ads and unwanted elements
+                for unwanted in content_div.find_all(['script', 'style', '.VCSortableInPreviewMode']):
+                    unwanted.decompose()
+                
+                # Get text content
+                paragraphs = content_div.find_all('p')
+                if paragraphs:
+                    content = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+                    return content
+                else:
+                    return content_div.get_text(strip=True)
+        
+        return ""
+    
+    def extract_summary(self, soup: BeautifulSoup) -> str:
+        """Extract article summary/description"""
+        summary_selectors = [
+            '.description',
+            '.sapo',
+            '.Lead',
+            'p.description',
+            '.article-summary'
+        ]
+        
+        for selector in summary_selectors:
+            summary_tag = soup.select_one(selector)
+            if summary_tag:
+                return summary_tag.get_text(strip=True)
+        
+        return ""
+    
+    def extract_author(self, soup: BeautifulSoup) -> str:
+        """Extract article author"""
+        author_selectors = [
+            '.author',
+            '.article-author',
+            '.byline',
+            '.writer'
+        ]
+        
+        for selector in author_selectors:
+            author_tag = soup.select_one(selector)
+            if author_tag:
+                return author_tag.get_text(strip=True)
+        
+        return ""
+    
+    def extract_category(self, url: str, soup: BeautifulSoup) -> str:
+        """Extract article category"""
+        # Try to get category from URL
+        for cat_slug, cat_name in self.categories.items():
+            if f'/{cat_slug}/' in url:
+                return cat_name
+        
+        # Try to get from breadcrumb
+        breadcrumb = soup.select_one('.breadcrumb')
+        if breadcrumb:
+            links = breadcrumb.find_all('a')
+            if len(links) > 1:
+                return links[1].get_text(strip=True)
+        
+        return "Khác"
+    
+    def extract_published_date(self, soup: BeautifulSoup) -> Optional[datetime]:
+        """Extract article published date"""
+        date_selectors = [
+            '.date',
+            '.time',
+            '.publish-time',
+            '.article-date'
+        ]
+        
+        for selector in date_selectors:
+            date_tag = soup.select_one(selector)
+            if date_tag:
+                date_text = date_tag.get_text(strip=True)
+                return self.parse_vietnamese_date(date_text)
+        
+        return None
+    
+    def extract_image_url(self, soup: BeautifulSoup) -> str:
+        """Extract main article image"""
+        img_selectors = [
+            '.fig-picture img',
+            '.photo img',
+            'article img',
+            '.content-detail img'
+        ]
+        
+        for selector in img_selectors:
+            img_tag = soup.select_one(selector)
+            if img_tag and img_tag.get('src'):
+                img_url = img_tag['src']
+                if img_url.startswith('//'):
+                    img_url = 'https:' + img_url
+                elif img_url.startswith('/'):
+                    img_url = self.base_url + img_url
+                return img_url
+        
+        return ""
+    
+    def extract_tags(self, soup: BeautifulSoup) -> List[str]:
+        """Extract article tags"""
+        tags = []
+        
+        # Try to find tags in various locations
+        tag_selectors = [
+            '.tags a',
+            '.article-tags a',
+            '.tag-list a'
+        ]
+        
+        for selector in tag_selectors:
+            tag_elements = soup.select(selector)
+            for tag_elem in tag_elements:
+                tag_text = tag_elem.get_text(strip=True)
+                if tag_text and tag_text not in tags:
+                    tags.append(tag_text)
+        
+        return tags
+    
+    def parse_vietnamese_date(self, date_text: str) -> Optional[datetime]:
+        """Parse Vietnamese date format"""
+        try:
+            # Remove common Vietnamese date prefixes
+            date_text = re.sub(r'^(Ngày|ngày|Thứ.*?,?\s*)', '', date_text.strip())
+            
+            # Handle different date formats
+            patterns = [
+                r'(\d{1,2})/(\d{1,2})/(\d{4})',  # DD/MM/YYYY
+                r'(\d{1,2})-(\d{1,2})-(\d{4})',  # DD-MM-YYYY
+                r'(\d{4})-(\d{1,2})-(\d{1,2})',  # YYYY-MM-DD
+            ]
+            
+            for pattern in patterns:
+                match = re.search(pattern, date_text)
+                if match:
+                    groups = match.groups()
+                    if len(groups) == 3:
+                        if len(groups[0]) == 4:  # YYYY-MM-DD format
+                            year, month, day = map(int, groups)
+                        else:  # DD/MM/YYYY or DD-MM-YYYY format
+                            day, month, year = map(int, groups)
+                        
+                        return datetime(year, month, day)
+            
+            return None
+            
+        except Exception as e:
+            print(f"Error parsing date '{date_text}': {e}")
+            return None
+
+# Extractor used by each parser process, built on first use
+_worker_extractors: Dict[tuple, ArticleExtractor] = {}
+
+def parse_in_worker(backend: str, base_url: str, url: str, content: bytes) -> Dict:
+    """Parse one article page inside a parser process"""
+    key = (backend, base_url)
+    if key not in _worker_extractors:
+        _worker_extractors[key] = ArticleExtractor(base_url=base_url, parser=backend)
+    return _worker_extractors[key].parse_article(url, content)
@@ -0,0 +1,147 @@
+import logging
+import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from io import BytesIO
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+logger = logging.getLogger(__name__)
+
+# Where the frontier discovers new links: the HTML listing pages, the RSS feed
+# of each category, or the site's sitemap (which lists every category, so it
+# suits the homepage). RSS and sitemap fall back to HTML when they fail.
+DISCOVERY_BACKENDS = ('html', 'rss', 'sitemap')
+DISCOVERY_BACKEND = os.getenv('DISCOVERY_BACKEND', 'rss')
+DISCOVERY_SITEMAP_URL = os.getenv('DISCOVERY_SITEMAP_URL', '')
+
+# Feed of the homepage's latest articles
+HOMEPAGE_FEED = 'tin-moi-nhat'
+
+def parse_overrides(spec: str) -> Dict[str, str]:
+    """Per-listing backends from "homepage=sitemap,the-thao=html" """
+    overrides = {}
+    for entry in spec.split(','):
+        listing, _, backend = entry.partition('=')
+        if backend.strip():
+            overrides[listing.strip()] = backend.strip()
+    return overrides
+
+DISCOVERY_OVERRIDES = parse_overrides(os.getenv('DISCOVERY_BACKENDS', ''))
+
+class FeedItem(NamedTuple):
+    url: str
+    published: Optional[datetime]  # naive UTC
+
+def discovery_backend(category: str) -> str:
+    """Backend configured for a category ('' is the homepage)"""
+    backend = DISCOVERY_OVERRIDES.get(category or 'homepage', DISCOVERY_BACKEND)
+    return backend if backend in DISCOVERY_BACKENDS else 'html'
+
+def parse_timestamp(text: Optional[str]) -> Optional[datetime]:
+    """RFC 822 (RSS) or ISO 8601 (sitemap) timestamp as naive UTC"""
+    if not text or not text.strip():
+        return None
+    text = text.strip()
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def local_name(tag: str) -> str:
+    """Tag without its {namespace} prefix"""
+    return tag.rsplit('}', 1)[-1]
+
+def parse_rss(content: bytes) -> List[FeedItem]:
+    """Links and publish times of an RSS 2.0 feed's items, in feed order
+
+    iterparse reads the document incrementally and each item is cleared once
+    read, so the whole tree is never built.
+    """
+    items = []
+    link = published = None
+    in_item = False
+    for event, element in iterparse(BytesIO(content), events=('start', 'end')):
+        name = local_name(element.tag)
+        if event == 'start':
+            if name == 'item':
+                in_item, link, published = True, None, None
+            continue
+        if not in_item:
+            continue
+        if name == 'link':
+            link = (element.text or '').strip()
+        elif name == 'pubDate':
+            published = parse_timestamp(element.text)
+        elif name == 'item':
+            if link:
+                items.append(FeedItem(link, published))
+            in_item = False
+            element.clear()
+    return items
+
+def parse_sitemap(content: bytes) -> Tuple[List[FeedItem], List[FeedItem]]:
+    """URLs of a sitemap and, for a sitemap index, its child sitemaps
+
+    A Google News publication_date is preferred over lastmod. Read
+    incrementally like parse_rss; entries are dropped from the root once read.
+    """
+    urls, sitemaps = [], []
+    root = None
+    loc = lastmod = publication = None
+    for event, element in iterparse(BytesIO(content), events=('start', 'end')):
+        name = local_name(element.tag)
+        if event == 'start':
+            if root is None:
+                root = element
+            if name in ('url', 'sitemap'):
+                loc = lastmod = publication = None
+            continue
+        if name == 'loc':
+            loc = (element.text or '').strip()
+        elif name == 'lastmod':
+            lastmod = parse_timestamp(element.text)
+        elif name == 'publication_date':
+            publication = parse_timestamp(element.text)
+        elif name in ('url', 'sitemap'):
+            if loc:
+                (urls if name == 'url' else sitemaps).append(FeedItem(loc, publication or lastmod))
+            root.clear()
+    return urls, sitemaps
+
+def feed_url(base_url: str, category: str) -> str:
+    """RSS feed of a category, or of the latest articles for the homepage"""
+    return f"{base_url}/rss/{category or HOMEPAGE_FEED}.rss"
+
+def sitemap_url(base_url: str) -> str:
+    return DISCOVERY_SITEMAP_URL or f"{base_url}/sitemap.xml"
+
+def fetch_feed_items(scraper, category: str, backend: str) -> List[FeedItem]:
+    """Article links of a listing from its RSS feed or the sitemap; [] if unavailable
+
+    Downloads go through the scraper's conditional-request cache. For a
+    sitemap index only the most recently modified child sitemap is read.
+    """
+    try:
+        if backend == 'rss':
+            content, _ = scraper.fetch_listing(feed_url(scraper.base_url, category))
+            items = parse_rss(content)
+        elif backend == 'sitemap':
+            content, _ = scraper.fetch_listing(sitemap_url(scraper.base_url))
+            items, children = parse_sitemap(content)
+            if children:
+                newest = max(children, key=lambda child: child.published or datetime.min)
+                content, _ = scraper.fetch_listing(newest.url)
+                items, _ = parse_sitemap(content)
+        else:
+            return []
+    except Exception as e:
+        logger.warning(f"Could not read the {backend} feed of {category or 'homepage'}: {e}")
+        return []
+    return [item for item in items if scraper.is_valid_article_url(item.url)]
@@ -0,0 +1,212 @@
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from database import CrawlState, ReadSessionLocal, SessionLocal
+from feeds import discovery_backend, fetch_feed_items
+from scraper import VnExpressScraper, LISTING_PAGE_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Bounds on how often one listing is polled
+FRONTIER_MIN_INTERVAL_MINUTES = float(os.getenv('FRONTIER_MIN_INTERVAL_MINUTES', '5'))
+FRONTIER_MAX_INTERVAL_MINUTES = float(os.getenv('FRONTIER_MAX_INTERVAL_MINUTES', '240'))
+# New articles a poll should find on average; the interval is this over the rate
+FRONTIER_TARGET_NEW = float(os.getenv('FRONTIER_TARGET_NEW', '5'))
+# Listing pages read per poll at most while paging back to the watermark
+FRONTIER_MAX_PAGES = int(os.getenv('FRONTIER_MAX_PAGES', '20'))
+# The first poll of an RSS feed or sitemap takes the articles published this recently
+FRONTIER_BACKFILL_HOURS = float(os.getenv('FRONTIER_BACKFILL_HOURS', '24'))
+
+# Weight of the latest poll in the smoothed publishing rate
+RATE_SMOOTHING = 0.5
+
+ARTICLE_NUMBER = re.compile(r'-(\d+)\.html$')
+
+def article_number(url: str) -> Optional[int]:
+    """Article ID from the -<n>.html suffix of its URL; the site numbers articles in publishing order"""
+    match = ARTICLE_NUMBER.search(url)
+    return int(match.group(1)) if match else None
+
+class Discovery(NamedTuple):
+    links: List[str]  # links newer than the watermark that still need fetching
+    newest: Optional[int]  # highest article number seen
+    new_count: int  # articles newer than the watermark, stored or not
+    complete: bool  # False if paging stopped at FRONTIER_MAX_PAGES before the watermark
+
+class CrawlFrontier:
+    """Per-listing crawl state kept in the crawl_frontier table
+
+    Each listing (a category, or '' for the homepage) remembers the newest
+    article number seen on it. A poll pages back through the listing until it
+    reaches that watermark, so bursts are read in full and nothing older is
+    refetched. How long until the next poll follows the listing's publishing
+    rate: about FRONTIER_TARGET_NEW new articles per poll, within the min/max
+    interval.
+    """
+
+    def __init__(self, scraper: VnExpressScraper, initial_interval_minutes: float = 30,
+                 max_pages: int = FRONTIER_MAX_PAGES):
+        self.scraper = scraper
+        self.initial_interval_minutes = initial_interval_minutes
+        self.max_pages = max_pages
+
+    def state(self, db, category: str) -> CrawlState:
+        """Stored state of a listing, or a fresh one that is due now"""
+        state = db.get(CrawlState, category)
+        if state is None:
+            state = CrawlState(category=category, interval_minutes=self.initial_interval_minutes)
+        return state
+
+    def due(self, categories: List[str], now: Optional[datetime] = None) -> List[str]:
+        """The categories whose next poll time has come, in the given order"""
+        now = now or datetime.utcnow()
+        db = ReadSessionLocal()
+        try:
+            next_crawl = dict(db.query(CrawlState.category, CrawlState.next_crawl_at).filter(
+                CrawlState.category.in_(categories)
+            ))
+        finally:
+            db.close()
+        return [
+            category for category in categories
+            if next_crawl.get(category) is None or next_crawl[category] <= now
+        ]
+
+    def discover(self, category: str) -> Discovery:
+        """Links published on a listing since its watermark
+
+        Tries the category's RSS feed or sitemap first (see feeds.py) and falls
+        back to the HTML listing pages when that fails or does not reach back
+        to the watermark.
+        """
+        db = ReadSessionLocal()
+        try:
+            watermark = self.state(db, category).watermark
+        finally:
+            db.close()
+
+        backend = discovery_backend(category)
+        if backend != 'html':
+            discovery = self.discover_from_feed(category, backend, watermark)
+            if discovery is not None:
+                return discovery
+        return self.discover_from_pages(category, watermark)
+
+    def discover_from_feed(self, category: str, backend: str, watermark: Optional[int]) -> Optional[Discovery]:
+        """Links newer than the watermark from an RSS feed or sitemap, or None to fall back
+
+        Feed items carry their publish time, so on the first poll (no watermark)
+        articles older than FRONTIER_BACKFILL_HOURS are skipped without fetching them.
+        """
+        numbered = [(item, article_number(item.url)) for item in fetch_feed_items(self.scraper, category, backend)]
+        numbered = [(item, number) for item, number in numbered if number is not None]
+        if not numbered:
+            return None
+
+        if watermark is None:
+            cutoff = datetime.utcnow() - timedelta(hours=FRONTIER_BACKFILL_HOURS)
+            newer = [item.url for item, _ in numbered if item.published is None or item.published >= cutoff]
+        elif min(number for _, number in numbered) > watermark:
+            logger.info(f"Frontier {category or 'homepage'}: {backend} feed does not reach back to "
+                        f"{watermark}, reading the listing pages")
+            return None
+        else:
+            newer = [item.url for item, number in numbered if number > watermark]
+
+        newer = list(dict.fromkeys(newer))
+        found = self.scraper.filter_new_links(newer, [])
+        logger.info(f"Frontier {category or 'homepage'}: {len(newer)} new since {watermark}, "
+                    f"{len(found)} to fetch from the {backend} feed")
+        return Discovery(found, max(number for _, number in numbered), len(newer), True)
+
+    def discover_from_pages(self, category: str, watermark: Optional[int]) -> Discovery:
+        """Links newer than the watermark from the HTML listing pages
+
+        Without a watermark (first poll) only the first page is read. Otherwise
+        paging stops at the first page where most links are at or below the
+        watermark, which tolerates a few older pinned articles at the top.
+        """
+        links = self.scraper.get_article_links(category, LISTING_PAGE_WINDOW)
+        found, newer_seen, newest, complete = [], set(), None, True
+        page = 1
+        while True:
+            numbered = [(url, article_number(url)) for url in links]
+            numbered = [(url, number) for url, number in numbered if number is not None]
+            newer = [url for url, number in numbered if watermark is None or number > watermark]
+            if numbered:
+                newest = max([newest or 0] + [number for _, number in numbered])
+            newer_seen.update(newer)
+            found.extend(self.scraper.filter_new_links(newer, found))
+
+            if watermark is None or not numbered or len(newer) * 2 <= len(numbered):
+                break
+            if not self.scraper.page_url(category, page + 1):
+                break  # the homepage has no further pages
+            if page >= self.max_pages:
+                complete = False
+                break
+            page += 1
+            links = self.scraper.get_article_links_from_page(category, page, LISTING_PAGE_WINDOW)
+
+        logger.info(f"Frontier {category or 'homepage'}: {len(newer_seen)} new since {watermark}, "
+                    f"{len(found)} to fetch from {page} pages")
+        return Discovery(found, newest, len(newer_seen), complete)
+
+    def record(self, category: str, discovery: Discovery, now: Optional[datetime] = None):
+        """Advance a listing's watermark and schedule its next poll from the observed rate
+
+        The watermark only moves once a poll reached it, so an incomplete poll
+        leaves no gap of unread articles behind.
+        """
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            state = self.state(db, category)
+            if discovery.newest is None:
+                # Nothing could be read (e.g. the listing failed to load): retry
+                # after the current interval without counting it as a quiet period
+                state.next_crawl_at = now + timedelta(minutes=state.interval_minutes)
+                db.add(state)
+                db.commit()
+                return
+            if discovery.complete:
+                state.watermark = max(state.watermark or 0, discovery.newest)
+            # Otherwise keep the old watermark: paging stopped before it, and the
+            # next poll must page back to it to fetch the articles in between
+            # (those already read are skipped as known URLs)
+
+            if state.last_crawled_at is not None and state.last_crawled_at < now:
+                hours = (now - state.last_crawled_at).total_seconds() / 3600
+                observed = discovery.new_count / hours
+                state.articles_per_hour = observed if state.articles_per_hour is None else (
+                    RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * state.articles_per_hour
+                )
+                state.interval_minutes = self.next_interval(state.articles_per_hour, discovery.complete)
+            state.last_crawled_at = now
+            state.next_crawl_at = now + timedelta(minutes=state.interval_minutes)
+
+            db.add(state)
+            db.commit()
+        finally:
+            db.close()
+
+    def states(self) -> List[CrawlState]:
+        """Stored state of every listing, soonest due first"""
+        db = ReadSessionLocal()
+        try:
+            return db.query(CrawlState).order_by(CrawlState.next_crawl_at).all()
+        finally:
+            db.close()
+
+    def next_interval(self, articles_per_hour: float, complete: bool = True) -> float:
+        """Minutes until the next poll of a listing publishing at this rate"""
+        if not complete:
+            # Paging ran out before the watermark: the listing is outrunning us
+            return FRONTIER_MIN_INTERVAL_MINUTES
+        if articles_per_hour <= 0:
+            return FRONTIER_MAX_INTERVAL_MINUTES
+        minutes = FRONTIER_TARGET_NEW / articles_per_hour * 60
+        return min(max(minutes, FRONTIER_MIN_INTERVAL_MINUTES), FRONTIER_MAX_INTERVAL_MINUTES)
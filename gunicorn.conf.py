@@ -7,4 +7,15 @@ max_requests = 1000
 max_requests_jitter = 100
 timeout = 30
 keepalive = 2
-preload_app = True
\ No newline at end of file
+preload_app = True
+
+def post_fork(server, worker):
+    """Drop any database connections inherited from the master; each worker opens its own"""
+    from database import engine, read_engine
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    """Write a worker's buffered article views before it exits (e.g. on max_requests)"""
+    from views import view_counter
+    view_counter.stop()
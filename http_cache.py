@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.getenv('SCRAPE_HTTP_CACHE_DIR', './http_cache')
+
+@dataclass
+class HttpCacheStats:
+    """Counters for one scrape run"""
+    requests: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    bytes_downloaded: int = 0
+    bytes_saved: int = 0
+    parses_avoided: int = 0
+
+class HttpCache:
+    """On-disk cache of listing pages for conditional requests
+
+    For each URL it keeps the last body, its ETag/Last-Modified headers and a
+    SHA-256 of the body, plus results parsed from that body. A 304 response or a
+    body with the same hash means the page did not change, so the stored parse
+    results can be reused instead of parsing the HTML again.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.stats = HttpCacheStats()
+        self._lock = threading.Lock()
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url, 'json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, url: str, meta: Dict[str, Any]):
+        self._write(self._path(url, 'json'), json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def reset_stats(self) -> HttpCacheStats:
+        """Start a new run and return the counters of the previous one"""
+        with self._lock:
+            stats, self.stats = self.stats, HttpCacheStats()
+        return stats
+
+    def stats_dict(self) -> Dict[str, int]:
+        """Current run's counters as a dict"""
+        with self._lock:
+            return asdict(self.stats)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a cached URL"""
+        meta = self._load_meta(url)
+        if not meta or not os.path.exists(self._path(url, 'body')):
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def not_modified(self, url: str) -> bytes:
+        """Handle a 304 response: return the cached body"""
+        with open(self._path(url, 'body'), 'rb') as f:
+            content = f.read()
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.not_modified += 1
+            self.stats.bytes_saved += len(content)
+        return content
+
+    def store(self, url: str, headers, content: bytes) -> bool:
+        """Handle a 200 response; returns True if the body is unchanged since last time"""
+        digest = hashlib.sha256(content).hexdigest()
+        meta = self._load_meta(url) or {}
+        unchanged = meta.get('sha256') == digest
+
+        new_meta = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'sha256': digest,
+            # Parse results only stay valid for the body they came from
+            'parsed': meta.get('parsed', {}) if unchanged else {}
+        }
+        if not unchanged:
+            self._write(self._path(url, 'body'), content)
+        self._save_meta(url, new_meta)
+
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.bytes_downloaded += len(content)
+            if unchanged:
+                self.stats.unchanged += 1
+        return unchanged
+
+    def get_parsed(self, url: str, key: str) -> Optional[Any]:
+        """Parse result stored for the cached body, if any"""
+        meta = self._load_meta(url)
+        if not meta or key not in meta.get('parsed', {}):
+            return None
+        with self._lock:
+            self.stats.parses_avoided += 1
+        return meta['parsed'][key]
+
+    def set_parsed(self, url: str, key: str, value: Any):
+        """Remember a parse result for the cached body"""
+        meta = self._load_meta(url)
+        if meta is None:
+            return
+        meta.setdefault('parsed', {})[key] = value
+        self._save_meta(url, meta)
@@ -0,0 +1,145 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert
+from typing import Iterable, List, Dict, NamedTuple, Optional
+import json
+import threading
+from datetime import datetime
+
+from database import NewsArticle, ReadSessionLocal
+from cache import response_cache
+from slugs import category_slug
+from stats import record_new_articles
+from tags import store_article_tags
+
+# SQLite's default limit on bound parameters per statement is 999
+URL_BATCH_SIZE = 500
+
+class IngestResult(NamedTuple):
+    inserted: int
+    skipped: int
+
+class KnownUrls:
+    """In-memory set of stored article URLs
+
+    Loaded once from news_articles.url and kept current by ingest_articles, so the
+    scraper can skip links that are already stored before downloading them.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._urls = set(urls)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> 'KnownUrls':
+        """Build the set from every URL in the database"""
+        db = ReadSessionLocal()
+        try:
+            return cls(url for (url,) in db.query(NewsArticle.url).yield_per(10000))
+        finally:
+            db.close()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def update(self, urls: Iterable[str]):
+        """Record newly stored URLs"""
+        with self._lock:
+            self._urls.update(urls)
+
+def article_row(article_data: Dict) -> Dict:
+    """Map a scraped article dict onto news_articles column values"""
+    return {
+        'title': article_data.get('title', ''),
+        'content': article_data.get('content', ''),
+        'summary': article_data.get('summary', ''),
+        'author': article_data.get('author', ''),
+        'category': article_data.get('category', ''),
+        'category_slug': category_slug(article_data.get('category', '')),
+        'url': article_data['url'],
+        'image_url': article_data.get('image_url', ''),
+        'published_date': article_data.get('published_date'),
+        'tags': json.dumps(article_data.get('tags', []), ensure_ascii=False)
+    }
+
+def existing_urls(db: Session, urls: List[str]) -> set:
+    """Return the subset of urls already stored, using one IN query per batch"""
+    found = set()
+    for i in range(0, len(urls), URL_BATCH_SIZE):
+        batch = urls[i:i + URL_BATCH_SIZE]
+        found.update(
+            url for (url,) in db.query(NewsArticle.url).filter(NewsArticle.url.in_(batch))
+        )
+    return found
+
+def article_ids(db: Session, urls: List[str]) -> Dict[str, int]:
+    """Ids of stored articles by URL, using one IN query per batch"""
+    ids = {}
+    for i in range(0, len(urls), URL_BATCH_SIZE):
+        batch = urls[i:i + URL_BATCH_SIZE]
+        ids.update(db.query(NewsArticle.url, NewsArticle.id).filter(NewsArticle.url.in_(batch)))
+    return ids
+
+def stamp_scraped_date(db: Session, urls: List[str], scraped_date: datetime):
+    """Set scraped_date on the rows of urls just inserted and count them in the stats
+
+    Called after the INSERT, while this transaction holds SQLite's write lock: no
+    other batch can commit in between, so a later scraped_date means a later
+    commit. One scraped_date per batch also tells its rows apart from any
+    another process inserted.
+    """
+    for i in range(0, len(urls), URL_BATCH_SIZE):
+        batch = urls[i:i + URL_BATCH_SIZE]
+        db.execute(
+            update(NewsArticle.__table__)
+            .where(NewsArticle.url.in_(batch), NewsArticle.scraped_date.is_(None))
+            .values(scraped_date=scraped_date)
+        )
+    record_new_articles(db, scraped_date)
+
+def ingest_articles(db: Session, articles_data: List[Dict], commit: bool = True,
+                    known_urls: Optional[KnownUrls] = None) -> IngestResult:
+    """Store scraped articles that are not in the database yet
+
+    Known URLs are looked up in bulk and new rows are written with a single
+    executemany INSERT. ON CONFLICT(url) DO NOTHING covers rows inserted by
+    another process between the lookup and the insert. If known_urls is given,
+    it is updated with the batch once the rows are committed. New rows get their
+    scraped_date only after the insert has taken the write lock, so it follows
+    commit order and an export watermark never passes a batch that commits
+    late. Committing new rows also invalidates the API response cache. Tags of new articles are
+    linked in the tag tables and counted in the stats rollups in the same
+    transaction.
+    """
+    # Drop duplicates within the batch, keeping the first occurrence
+    unique = {}
+    for article_data in articles_data:
+        unique.setdefault(article_data['url'], article_data)
+
+    known = existing_urls(db, list(unique))
+    # Inserted without a scraped_date, which is set below once the lock is held
+    rows = [dict(article_row(data), scraped_date=None) for url, data in unique.items() if url not in known]
+
+    inserted = 0
+    if rows:
+        stmt = insert(NewsArticle.__table__).on_conflict_do_nothing(index_elements=['url'])
+        inserted = db.execute(stmt, rows).rowcount
+        if inserted:
+            stamp_scraped_date(db, [row['url'] for row in rows], datetime.utcnow())
+        tags_by_url = {row['url']: unique[row['url']].get('tags') or [] for row in rows}
+        store_article_tags(db, {
+            article_id: tags_by_url[url]
+            for url, article_id in article_ids(db, [url for url, tags in tags_by_url.items() if tags]).items()
+        })
+
+    if commit:
+        db.commit()
+        if known_urls is not None:
+            known_urls.update(unique)
+        if inserted:
+            response_cache.bump_version()
+
+    return IngestResult(inserted=inserted, skipped=len(articles_data) - inserted)
@@ -1,20 +1,43 @@
 from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
-from typing import List, Optional
-import json
-from datetime import datetime, timedelta
+from sqlalchemy import func, false, select
+from typing import List, Literal, Optional, Tuple, Union
+import os
+from datetime import date, datetime, timedelta
 
-from database import get_db, NewsArticle
-from scraper import VnExpressScraper
+from database import get_db, get_async_read_db, SessionLocal, AsyncReadSessionLocal, NewsArticle, Tag
+from cache import response_cache
+from views import view_counter
+from scheduler import scheduler
+from ingestion import ingest_articles, KnownUrls
+from async_scraper import AsyncVnExpressScraper
+from retry_queue import RetryQueue
+from pagination import KEYSET_ORDER, after_cursor, encode_cursor
+from search import search_articles as search_index, build_match_query, matching_ids
+from projections import COMPACT_COLUMNS, compact_article, article_dict
+from export import EXPORT_CHUNK_SIZE, EXPORT_ENCODERS, export_query
+from tags import tag_counts_query, tagged_articles_query
+from slugs import category_slug, slugify
+from stats import (
+    category_counts_query, recent_count_query, record_soft_delete, slug_counts_query, timeline_query, totals_query
+)
 from schemas import (
     NewsArticleResponse, 
     NewsArticleList, 
+    NewsArticleSearchList, 
+    NewsArticleCompactList,
+    NewsArticleCompactSearchList,
     ScrapeRequest, 
     ScrapeResponse,
     CategoryResponse,
-    StatsResponse
+    StatsResponse,
+    StatsTimeline,
+    TagList
 )
 
 app = FastAPI(
@@ -32,8 +55,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize scraper
-scraper = VnExpressScraper()
+# Initialize scraper (one shared connection pool per worker)
+scraper = AsyncVnExpressScraper()
+# Articles /scrape fails to fetch transiently are retried by the scheduler
+scraper.retry_queue = RetryQueue()
+
+# Every worker starts a scheduler; the coordination lock lets one of them crawl per interval
+ENABLE_SCHEDULER = os.getenv('ENABLE_SCHEDULER', 'false').lower() == 'true'
+
+@app.on_event("startup")
+async def start_scheduler():
+    """Start the view counter flusher, and the scraping scheduler if enabled"""
+    view_counter.start()
+    if ENABLE_SCHEDULER:
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def close_scraper():
+    """Close the scraper's HTTP connection pool and write buffered views"""
+    await scraper.aclose()
+    if ENABLE_SCHEDULER:
+        scheduler.stop()
+    view_counter.stop()
+
+# /articles pages up to this number are served from the response cache
+CACHED_ARTICLE_PAGES = 3
+
+async def cached_json(cache_key: str) -> Tuple[Optional[Response], int]:
+    """Cached response for a key if there is a fresh one, and the data version to cache a new one at"""
+    body, version = await response_cache.get(cache_key)
+    if body is None:
+        return None, version
+    return Response(content=body, media_type="application/json"), version
+
+async def cache_json(cache_key: str, content, version: int) -> Response:
+    """Serialize plain response data with orjson, cache it at the version it was read at and return it"""
+    response = ORJSONResponse(content=content)
+    await response_cache.set(cache_key, response.body, version)
+    return response
+
+def list_content(articles: List[dict], total: Optional[int], page: int, limit: int,
+                 next_cursor: Optional[str]) -> dict:
+    """Body of a paged article list, keyed in NewsArticleList order
+    
+    List endpoints build plain dicts and serialize them with orjson instead of
+    validating response models; the bytes match what the models would produce.
+    """
+    return {
+        "articles": articles,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "total_pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
+    }
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -47,6 +122,7 @@ async def root():
             "articles": "/articles",
             "search": "/articles/search",
             "categories": "/categories",
+            "tags": "/tags",
             "stats": "/stats"
         }
     }
@@ -55,7 +131,7 @@ async def root():
 async def scrape_news(
     scrape_request: ScrapeRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Scrape news articles from VnExpress"""
     try:
@@ -63,239 +139,407 @@ async def scrape_news(
         background_tasks.add_task(
             scrape_articles_background,
             scrape_request.category,
-            scrape_request.limit,
-            db
+            scrape_request.limit
         )
         
         return ScrapeResponse(
             success=True,
             message=f"Scraping started for category '{scrape_request.category or 'all'}' with limit {scrape_request.limit}",
             scraped_count=0,
-            total_articles=db.query(NewsArticle).count()
+            total_articles=await db.scalar(select(func.count(NewsArticle.id)))
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting scrape: {str(e)}")
 
-async def scrape_articles_background(category: Optional[str], limit: int, db: Session):
-    """Background task for scraping articles"""
+async def scrape_articles_background(category: Optional[str], limit: int):
+    """Background task for scraping articles
+    
+    The write session is only opened once the articles are downloaded, so the
+    writer connection is not held for the length of the scrape. Database work
+    runs in the thread pool, as it may wait for the writer connection.
+    """
     try:
-        # Scrape articles
-        articles_data = scraper.scrape_multiple_articles(category or '', limit)
-        
-        scraped_count = 0
-        for article_data in articles_data:
-            # Check if article already exists
-            existing_article = db.query(NewsArticle).filter(
-                NewsArticle.url == article_data['url']
-            ).first()
-            
-            if not existing_article:
-                # Create new article
-                db_article = NewsArticle(
-                    title=article_data.get('title', ''),
-                    content=article_data.get('content', ''),
-                    summary=article_data.get('summary', ''),
-                    author=article_data.get('author', ''),
-                    category=article_data.get('category', ''),
-                    url=article_data['url'],
-                    image_url=article_data.get('image_url', ''),
-                    published_date=article_data.get('published_date'),
-                    tags=json.dumps(article_data.get('tags', []), ensure_ascii=False)
-                )
-                
-                db.add(db_article)
-                scraped_count += 1
+        # Skip links that are already stored before fetching them
+        if scraper.known_urls is None:
+            scraper.known_urls = await run_in_threadpool(KnownUrls.load)
         
-        db.commit()
-        print(f"Successfully scraped {scraped_count} new articles")
+        # Scrape articles
+        articles_data = await scraper.scrape_multiple_articles(category or '', limit)
         
+    except Exception as e:
+        print(f"Error in background scraping: {e}")
+        return
+    
+    await run_in_threadpool(store_articles, articles_data)
+
+def store_articles(articles_data: List[dict]):
+    """Save scraped articles from the background task"""
+    db = SessionLocal()
+    try:
+        result = ingest_articles(db, articles_data, known_urls=scraper.known_urls)
+        print(f"Successfully scraped {result.inserted} new articles ({result.skipped} already stored)")
     except Exception as e:
         print(f"Error in background scraping: {e}")
         db.rollback()
+    finally:
+        db.close()
 
-@app.get("/articles", response_model=NewsArticleList, tags=["Articles"])
+@app.get("/articles", response_model=Union[NewsArticleList, NewsArticleCompactList], tags=["Articles"])
 async def get_articles(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Articles per page"),
-    category: Optional[str] = Query(None, description="Filter by category"),
+    category: Optional[str] = Query(None, description="Filter by category slug or name"),
     search: Optional[str] = Query(None, description="Search in title and content"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    with_total: bool = Query(True, description="Count matching articles (skip for faster pages)"),
+    fields: Literal['full', 'compact'] = Query('full', description="compact omits content and truncates summary"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get articles with pagination and filtering"""
+    """Get articles with pagination and filtering
+    
+    Pages can be addressed by number (page) or, for constant-time deep paging,
+    by the next_cursor returned with every full page. fields=compact only loads
+    the columns a feed needs and returns a much smaller payload.
+    """
     try:
+        # First pages of plain listings are served from the response cache
+        cache_key = None
+        if not search and not cursor and page <= CACHED_ARTICLE_PAGES:
+            cache_key = f"articles:{page}:{limit}:{category or ''}:{with_total}:{fields}"
+            cached, version = await cached_json(cache_key)
+            if cached is not None:
+                return cached
+        
         # Build query
-        query = db.query(NewsArticle).filter(NewsArticle.is_active == True)
+        compact = fields == 'compact'
+        query = select(*COMPACT_COLUMNS) if compact else select(NewsArticle)
+        query = query.where(NewsArticle.is_active == True)
         
         # Apply filters
         if category:
-            query = query.filter(NewsArticle.category.ilike(f"%{category}%"))
+            query = query.where(NewsArticle.category_slug == category_slug(category))
         
         if search:
-            search_filter = func.lower(NewsArticle.title).contains(search.lower()) | \
-                          func.lower(NewsArticle.content).contains(search.lower())
-            query = query.filter(search_filter)
+            match = build_match_query(search)
+            if match is None:
+                query = query.where(false())
+            else:
+                query = query.where(NewsArticle.id.in_(matching_ids(match)))
         
         # Get total count
-        total = query.count()
+        total = None
+        if with_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
         
         # Apply pagination
-        offset = (page - 1) * limit
-        articles = query.order_by(desc(NewsArticle.published_date)).offset(offset).limit(limit).all()
-        
-        # Calculate total pages
-        total_pages = (total + limit - 1) // limit
-        
-        return NewsArticleList(
-            articles=articles,
-            total=total,
-            page=page,
-            limit=limit,
-            total_pages=total_pages
-        )
-        
+        if cursor:
+            query = query.where(after_cursor(cursor))
+            offset = 0
+        else:
+            offset = (page - 1) * limit
+        page_query = query.order_by(*KEYSET_ORDER).offset(offset).limit(limit)
+        if compact:
+            rows = (await db.execute(page_query)).all()
+            articles = [compact_article(row) for row in rows]
+        else:
+            rows = (await db.scalars(page_query)).all()
+            articles = [article_dict(article) for article in rows]
+        
+        next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+        content = list_content(articles, total, page, limit, next_cursor)
+        
+        return await cache_json(cache_key, content, version) if cache_key else ORJSONResponse(content)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving articles: {str(e)}")
 
+async def stream_export(query, encoder):
+    """Encoded export chunks, read from the database EXPORT_CHUNK_SIZE rows at a time
+    
+    The session is opened here rather than through a dependency so it stays
+    open for as long as the response is streaming.
+    """
+    yield encoder.begin()
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        async for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.end()
+
+@app.get("/articles/export", tags=["Articles"])
+async def export_articles(
+    format: Literal['ndjson', 'csv', 'parquet'] = Query('ndjson', description="Output format"),
+    category: Optional[str] = Query(None, description="Filter by category slug or name"),
+    published_from: Optional[Union[datetime, date]] = Query(None, description="Published on or after (date or datetime)"),
+    published_to: Optional[Union[datetime, date]] = Query(None, description="Published before (date or datetime)"),
+    since: Optional[str] = Query(None, description="Watermark 'scraped_date[,id]': only articles scraped after it"),
+):
+    """Stream every matching article, ordered by scraped_date and id
+    
+    Rows are read and sent in chunks, so memory stays flat however large the
+    result. For incremental pulls, pass the scraped_date and id of the last
+    row received as since=<scraped_date>,<id>.
+    """
+    try:
+        query = export_query(category, since, published_from, published_to)
+        encoder = EXPORT_ENCODERS[format]()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    extension = 'jsonl' if format == 'ndjson' else format
+    return StreamingResponse(
+        stream_export(query, encoder),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="articles.{extension}"'}
+    )
+
 @app.get("/articles/{article_id}", response_model=NewsArticleResponse, tags=["Articles"])
-async def get_article(article_id: int, db: Session = Depends(get_db)):
+async def get_article(article_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get a specific article by ID"""
     try:
-        article = db.query(NewsArticle).filter(
+        article = await db.scalar(select(NewsArticle).where(
             NewsArticle.id == article_id,
             NewsArticle.is_active == True
-        ).first()
+        ))
         
         if not article:
             raise HTTPException(status_code=404, detail="Article not found")
         
-        # Increment view count
-        article.view_count += 1
-        db.commit()
+        # Count the view in memory; it reaches the database with the next batch
+        view_counter.record(article.id)
+        content = article_dict(article)
+        content["view_count"] = (content["view_count"] or 0) + view_counter.pending(article.id)
         
-        return article
+        return ORJSONResponse(content)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving article: {str(e)}")
 
-@app.get("/articles/search/{query}", response_model=NewsArticleList, tags=["Articles"])
+@app.get("/articles/search/{query}", response_model=Union[NewsArticleSearchList, NewsArticleCompactSearchList],
+         tags=["Articles"])
 async def search_articles(
     query: str,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Articles per page"),
-    db: Session = Depends(get_db)
+    sort: Literal['relevance', 'date'] = Query('relevance', description="Order by relevance or newest first"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; implies sort=date"),
+    with_total: bool = Query(True, description="Count matching articles (skip for faster pages)"),
+    fields: Literal['full', 'compact'] = Query('full', description="compact omits content and truncates summary"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Search articles by query in title and content"""
+    """Full-text search in title, summary and content, ranked by relevance
+    
+    Matching ignores Vietnamese diacritics, so "thoi su" finds "Thời sự".
+    Date-sorted results can be paged with next_cursor.
+    """
     try:
-        # Build search query
-        search_filter = func.lower(NewsArticle.title).contains(query.lower()) | \
-                       func.lower(NewsArticle.content).contains(query.lower()) | \
-                       func.lower(NewsArticle.summary).contains(query.lower())
-        
-        query_obj = db.query(NewsArticle).filter(
-            and_(NewsArticle.is_active == True, search_filter)
-        )
-        
-        # Get total count
-        total = query_obj.count()
+        if cursor:
+            sort = 'date'
         
         # Apply pagination
         offset = (page - 1) * limit
-        articles = query_obj.order_by(desc(NewsArticle.published_date)).offset(offset).limit(limit).all()
+        compact = fields == 'compact'
+        results, total = await search_index(db, query, offset, limit, sort, cursor, with_total, compact)
         
-        # Calculate total pages
-        total_pages = (total + limit - 1) // limit
+        if compact:
+            articles = [compact_article(row) for row, _ in results]
+        else:
+            articles = [dict(article_dict(article), snippet=snippet) for article, snippet in results]
         
-        return NewsArticleList(
-            articles=articles,
-            total=total,
-            page=page,
-            limit=limit,
-            total_pages=total_pages
-        )
+        # Cursors follow the date order, so relevance pages do not get one
+        next_cursor = None
+        if sort == 'date' and len(results) == limit:
+            next_cursor = encode_cursor(results[-1][0])
+        
+        return ORJSONResponse(list_content(articles, total, page, limit, next_cursor))
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching articles: {str(e)}")
 
 @app.get("/categories", response_model=CategoryResponse, tags=["Categories"])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_async_read_db)):
     """Get all available categories with article counts"""
     try:
+        cached, version = await cached_json("categories")
+        if cached is not None:
+            return cached
+        
         # Get categories from scraper
         scraper_categories = [
             {"slug": slug, "name": name, "count": 0}
             for slug, name in scraper.categories.items()
         ]
         
-        # Get actual counts from database
-        category_counts = db.query(
-            NewsArticle.category,
-            func.count(NewsArticle.id).label('count')
-        ).filter(
-            NewsArticle.is_active == True
-        ).group_by(NewsArticle.category).all()
+        # Get actual counts from the stats rollup
+        category_counts = (await db.execute(slug_counts_query())).all()
         
         # Update counts
-        count_dict = {cat: count for cat, count in category_counts}
+        count_dict = {slug: count for slug, count in category_counts}
         for cat_info in scraper_categories:
-            cat_info['count'] = count_dict.get(cat_info['name'], 0)
+            cat_info['count'] = count_dict.get(cat_info['slug'], 0)
         
-        return CategoryResponse(categories=scraper_categories)
+        return await cache_json("categories", jsonable_encoder(CategoryResponse(categories=scraper_categories)), version)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving categories: {str(e)}")
 
+@app.get("/tags", response_model=TagList, tags=["Tags"])
+async def get_tags(
+    limit: int = Query(100, ge=1, le=1000, description="Number of tags"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Most used tags with their article counts"""
+    try:
+        cache_key = f"tags:{limit}"
+        cached, version = await cached_json(cache_key)
+        if cached is not None:
+            return cached
+        
+        rows = (await db.execute(tag_counts_query(limit))).all()
+        return await cache_json(cache_key, {"tags": [dict(row._mapping) for row in rows]}, version)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving tags: {str(e)}")
+
+@app.get("/tags/{tag}/articles", response_model=Union[NewsArticleList, NewsArticleCompactList], tags=["Tags"])
+async def get_tag_articles(
+    tag: str,
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(20, ge=1, le=100, description="Articles per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    with_total: bool = Query(True, description="Count matching articles (skip for faster pages)"),
+    fields: Literal['full', 'compact'] = Query('full', description="compact omits content and truncates summary"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Articles with a tag, newest first
+    
+    tag is a slug from /tags or a tag name ("Đà Nẵng" and "da-nang" are the same tag).
+    """
+    try:
+        tag_id = await db.scalar(select(Tag.id).where(Tag.slug == slugify(tag)))
+        if tag_id is None:
+            raise HTTPException(status_code=404, detail="Tag not found")
+        
+        compact = fields == 'compact'
+        query = tagged_articles_query(tag_id, COMPACT_COLUMNS if compact else (NewsArticle,))
+        
+        total = None
+        if with_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        
+        if cursor:
+            query = query.where(after_cursor(cursor))
+            offset = 0
+        else:
+            offset = (page - 1) * limit
+        page_query = query.order_by(*KEYSET_ORDER).offset(offset).limit(limit)
+        if compact:
+            rows = (await db.execute(page_query)).all()
+            articles = [compact_article(row) for row in rows]
+        else:
+            rows = (await db.scalars(page_query)).all()
+            articles = [article_dict(article) for article in rows]
+        
+        next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+        return ORJSONResponse(list_content(articles, total, page, limit, next_cursor))
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving tag articles: {str(e)}")
+
 @app.get("/stats", response_model=StatsResponse, tags=["Statistics"])
-async def get_stats(db: Session = Depends(get_db)):
-    """Get statistics about scraped articles"""
+async def get_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """Get statistics about scraped articles
+    
+    Counts come from the category and hourly rollups kept current on ingest
+    and soft delete, so this reads a row per category rather than per article.
+    The recent count covers the last 24 hours to the hour.
+    """
     try:
-        # Total articles
-        total_articles = db.query(NewsArticle).count()
+        cached, version = await cached_json("stats")
+        if cached is not None:
+            return cached
         
-        # Active articles
-        active_articles = db.query(NewsArticle).filter(NewsArticle.is_active == True).count()
+        # Total and active articles
+        total_articles, active_articles = (await db.execute(totals_query())).one()
         
         # Articles by category
-        category_stats = db.query(
-            NewsArticle.category,
-            func.count(NewsArticle.id).label('count')
-        ).filter(
-            NewsArticle.is_active == True
-        ).group_by(NewsArticle.category).all()
+        category_stats = (await db.execute(category_counts_query())).all()
         
         articles_by_category = {cat: count for cat, count in category_stats}
         
         # Recent articles (last 24 hours)
         recent_date = datetime.utcnow() - timedelta(days=1)
-        recent_articles = db.query(NewsArticle).filter(
-            and_(
-                NewsArticle.scraped_date >= recent_date,
-                NewsArticle.is_active == True
-            )
-        ).count()
-        
-        return StatsResponse(
+        recent_articles = await db.scalar(recent_count_query(recent_date))
+        
+        return await cache_json("stats", jsonable_encoder(StatsResponse(
             total_articles=total_articles,
             articles_by_category=articles_by_category,
             recent_articles_count=recent_articles,
             active_articles_count=active_articles
-        )
+        )), version)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving stats: {str(e)}")
 
+@app.get("/stats/timeline", response_model=StatsTimeline, tags=["Statistics"])
+async def get_stats_timeline(
+    days: int = Query(7, ge=1, le=365, description="How many days back"),
+    interval: Literal['hour', 'day'] = Query('hour', description="Bucket size"),
+    category: Optional[str] = Query(None, description="Only this category (slug or name)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Articles scraped per hour or day, with how many are still active
+    
+    Buckets with no articles are left out.
+    """
+    try:
+        slug = category_slug(category) if category else None
+        cache_key = f"stats:timeline:{days}:{interval}:{slug or ''}"
+        cached, version = await cached_json(cache_key)
+        if cached is not None:
+            return cached
+        
+        since = datetime.utcnow() - timedelta(days=days)
+        rows = (await db.execute(timeline_query(since, interval, slug))).all()
+        return await cache_json(cache_key, {
+            "interval": interval,
+            "category": slug,
+            "buckets": [dict(row._mapping) for row in rows]
+        }, version)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving stats timeline: {str(e)}")
+
 @app.delete("/articles/{article_id}", tags=["Articles"])
-async def delete_article(article_id: int, db: Session = Depends(get_db)):
-    """Soft delete an article (mark as inactive)"""
+def delete_article(article_id: int, db: Session = Depends(get_db)):
+    """Soft delete an article (mark as inactive)
+    
+    A plain def, so FastAPI runs it in the thread pool while it waits for the
+    writer connection instead of blocking the event loop.
+    """
     try:
         article = db.query(NewsArticle).filter(NewsArticle.id == article_id).first()
         
         if not article:
             raise HTTPException(status_code=404, detail="Article not found")
         
-        article.is_active = False
+        if article.is_active:
+            record_soft_delete(db, article_id)
+            article.is_active = False
         db.commit()
+        response_cache.bump_version()
         
         return {"message": f"Article {article_id} has been deleted"}
         
@@ -304,6 +548,11 @@ async def delete_article(article_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting article: {str(e)}")
 
+@app.get("/cache/stats", tags=["Statistics"])
+async def get_cache_stats():
+    """Response cache hit/miss statistics for this worker"""
+    return response_cache.stats()
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint"""
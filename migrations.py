@@ -0,0 +1,176 @@
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.engine import Engine
+
+from database import FTS_SCHEMA, FTS_TABLE, NewsArticle, SessionLocal
+from export import export_query, format_watermark
+from pagination import KEYSET_ORDER, after_cursor, encode_cursor
+from slugs import category_slug
+from stats import rebuild_stats
+
+logger = logging.getLogger(__name__)
+
+# Schema changes to databases created by an older version. The number of the
+# last applied migration is kept in SQLite's user_version header field; each
+# step checks what already exists, so running it twice is harmless.
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Engine], None]
+
+def create_search_index(engine: Engine):
+    """Create the FTS5 index and its triggers if they do not exist yet"""
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+        if not exists:
+            for statement in FTS_SCHEMA:
+                conn.execute(text(statement))
+
+def fill_tag_tables(engine: Engine):
+    """Link stored articles to their tags in the tag tables"""
+    from tags import backfill_tags  # tags imports the models too
+    db = SessionLocal()
+    try:
+        backfill_tags(db)
+    finally:
+        db.close()
+
+def add_category_slugs(engine: Engine):
+    """Add news_articles.category_slug and fill it from category"""
+    table = NewsArticle.__table__
+    with engine.begin() as conn:
+        columns = {row.name for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+        if 'category_slug' not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN category_slug VARCHAR")
+        # One UPDATE per distinct category, found through ix_news_articles_category
+        categories = conn.scalars(
+            select(table.c.category).where(table.c.category_slug.is_(None)).distinct()
+        ).all()
+        for category in categories:
+            conn.execute(update(table).where(
+                table.c.category == category,
+                table.c.category_slug.is_(None)
+            ).values(category_slug=category_slug(category) if category is not None else None))
+
+def create_listing_indexes(engine: Engine):
+    """Replace the full-table listing indexes with the model's partial ones"""
+    with engine.begin() as conn:
+        for name in ('ix_news_articles_published_date_id', 'ix_news_articles_scraped_date_id'):
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    for index in NewsArticle.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    # Row estimates for the planner, so it prefers the new indexes
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ANALYZE {NewsArticle.__tablename__}")
+
+def fill_stats(engine: Engine):
+    """Count the stored articles into the stats rollups"""
+    db = SessionLocal()
+    try:
+        rebuild_stats(db)
+        db.commit()
+    finally:
+        db.close()
+
+MIGRATIONS = [
+    Migration(1, "Full-text search index", create_search_index),
+    Migration(2, "Tag tables filled from news_articles.tags", fill_tag_tables),
+    Migration(3, "news_articles.category_slug for exact category filters", add_category_slugs),
+    Migration(4, "Partial listing indexes over active articles", create_listing_indexes),
+    Migration(5, "Stats rollups filled from news_articles", fill_stats),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def schema_version(engine: Engine) -> int:
+    """Number of the last migration applied to the database"""
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def run_migrations(engine: Engine) -> List[Migration]:
+    """Apply the migrations the database has not seen yet, in order"""
+    version = schema_version(engine)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        migration.apply(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+        applied.append(migration)
+    return applied
+
+class PlanCheck(NamedTuple):
+    description: str
+    query: object
+    index: str
+
+class PlanResult(NamedTuple):
+    check: PlanCheck
+    plan: List[str]
+    ok: bool
+
+def plan_checks() -> List[PlanCheck]:
+    """The hot queries of the API and CLI with the index each should use"""
+    active = NewsArticle.is_active == True
+    cursor = encode_cursor(NewsArticle(id=1000, published_date=datetime(2024, 1, 1)))
+    watermark = format_watermark(NewsArticle(id=1000, scraped_date=datetime(2024, 1, 1)))
+    return [
+        PlanCheck(
+            "GET /articles",
+            select(NewsArticle).where(active).order_by(*KEYSET_ORDER).limit(20),
+            'ix_news_articles_active_published'
+        ),
+        PlanCheck(
+            "GET /articles?cursor=",
+            select(NewsArticle).where(active, after_cursor(cursor)).order_by(*KEYSET_ORDER).limit(20),
+            'ix_news_articles_active_published'
+        ),
+        PlanCheck(
+            "GET /articles?category=",
+            select(NewsArticle).where(
+                active, NewsArticle.category_slug == category_slug('thoi-su')
+            ).order_by(*KEYSET_ORDER).limit(20),
+            'ix_news_articles_active_category'
+        ),
+        PlanCheck(
+            "Stats rollup of an ingest batch",
+            select(func.count()).where(NewsArticle.scraped_date == datetime(2024, 1, 1), active),
+            'ix_news_articles_active_scraped'
+        ),
+        PlanCheck(
+            "cli.py list",
+            select(NewsArticle).where(active).order_by(NewsArticle.scraped_date.desc()).limit(10),
+            'ix_news_articles_active_scraped'
+        ),
+        PlanCheck(
+            "cli.py export --since",
+            export_query(since=watermark),
+            'ix_news_articles_active_scraped'
+        ),
+    ]
+
+def explain(conn, query) -> List[str]:
+    """EXPLAIN QUERY PLAN lines of a query"""
+    # Literal values, as the partial indexes only match a constant is_active = 1
+    sql = str(query.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    return [row.detail for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def verify_query_plans(engine: Engine) -> List[PlanResult]:
+    """Check that each hot query reads its index and needs no sort"""
+    results = []
+    with engine.connect() as conn:
+        for check in plan_checks():
+            plan = explain(conn, check.query)
+            uses_index = any(f"INDEX {check.index}" in line for line in plan)
+            sorts = any('TEMP B-TREE' in line for line in plan)
+            results.append(PlanResult(check, plan, uses_index and not sorts))
+    return results
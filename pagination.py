@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, desc, or_
+
+from database import NewsArticle
+
+# Keyset order shared by offset and cursor pages; NULL dates sort last
+KEYSET_ORDER = (desc(NewsArticle.published_date), desc(NewsArticle.id))
+
+def encode_cursor(article: NewsArticle) -> str:
+    """Opaque token pointing just after an article in KEYSET_ORDER"""
+    published = article.published_date.isoformat() if article.published_date else None
+    raw = json.dumps([published, article.id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        published, article_id = json.loads(raw)
+        return (datetime.fromisoformat(published) if published else None), int(article_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def after_cursor(cursor: str):
+    """Filter selecting the rows that follow a cursor in KEYSET_ORDER"""
+    published, article_id = decode_cursor(cursor)
+    if published is None:
+        return and_(NewsArticle.published_date.is_(None), NewsArticle.id < article_id)
+    return or_(
+        NewsArticle.published_date < published,
+        and_(NewsArticle.published_date == published, NewsArticle.id < article_id),
+        NewsArticle.published_date.is_(None)
+    )
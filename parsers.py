@@ -0,0 +1,223 @@
+from bs4 import BeautifulSoup
+from lxml import etree, html
+from typing import Dict, List, Optional, Tuple
+
+# Available article parser backends
+PARSER_BACKENDS = ('lxml', 'html.parser')
+
+# Field selectors in priority order; they mirror VnExpressScraper.extract_*
+FIELD_SELECTORS = {
+    'title': ['h1.title-detail', 'h1.title_news_detail', 'h1.title-news', 'h1', '.title-detail', '.title_news_detail'],
+    'content': ['.fck_detail', '.Normal', 'article .content-detail', '.content_detail', '.article-content'],
+    'summary': ['.description', '.sapo', '.Lead', 'p.description', '.article-summary'],
+    'author': ['.author', '.article-author', '.byline', '.writer'],
+    'date': ['.date', '.time', '.publish-time', '.article-date'],
+    'image': ['.fig-picture img', '.photo img', 'article img', '.content-detail img'],
+    'breadcrumb': ['.breadcrumb'],
+    'tags': ['.tags a', '.article-tags a', '.tag-list a'],
+}
+
+# Fields that need every match rather than the first one
+MULTI_MATCH_FIELDS = {'tags'}
+
+# VnExpress serves UTF-8; lxml would otherwise guess latin-1 for pages without a meta charset
+HTML_PARSER = html.HTMLParser(encoding='utf-8')
+
+# Elements whose text is never part of the article
+SKIPPED_TAGS = {'script', 'style'}
+
+class CompiledSelector:
+    """Minimal CSS selector: 'tag', '.class', 'tag.class' and descendant combinations"""
+
+    def __init__(self, selector: str):
+        parts = [self._parse_simple(part) for part in selector.split()]
+        self.target = parts[-1]
+        self.ancestors = parts[:-1]
+
+    @staticmethod
+    def _parse_simple(part: str) -> Tuple[Optional[str], Optional[str]]:
+        tag, _, css_class = part.partition('.')
+        return tag or None, css_class or None
+
+    @staticmethod
+    def _matches_simple(simple, tag: str, classes) -> bool:
+        want_tag, want_class = simple
+        return (want_tag is None or want_tag == tag) and (want_class is None or want_class in classes)
+
+    def matches(self, element, classes) -> bool:
+        if not self._matches_simple(self.target, element.tag, classes):
+            return False
+
+        # Match the remaining parts right to left against the ancestor chain
+        remaining = len(self.ancestors)
+        if not remaining:
+            return True
+        for ancestor in element.iterancestors():
+            ancestor_classes = (ancestor.get('class') or '').split()
+            if self._matches_simple(self.ancestors[remaining - 1], ancestor.tag, ancestor_classes):
+                remaining -= 1
+                if not remaining:
+                    return True
+        return False
+
+    @property
+    def index_key(self) -> Tuple[str, str]:
+        """Lookup key used to find candidate selectors for an element"""
+        tag, css_class = self.target
+        return ('class', css_class) if css_class else ('tag', tag)
+
+def _compile_selectors():
+    """Compile FIELD_SELECTORS into an index keyed by class or tag name"""
+    index = {}
+    for field, selectors in FIELD_SELECTORS.items():
+        for priority, selector in enumerate(selectors):
+            compiled = CompiledSelector(selector)
+            index.setdefault(compiled.index_key, []).append((field, priority, compiled))
+    return index
+
+# Compiled once per process
+SELECTOR_INDEX = _compile_selectors()
+
+def element_text(element) -> str:
+    """Stripped text of an element, equivalent to BeautifulSoup's get_text(strip=True)"""
+    parts = []
+    if element.text:
+        parts.append(element.text.strip())
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in SKIPPED_TAGS:
+            parts.append(element_text(child))
+        if child.tail:
+            parts.append(child.tail.strip())
+    return ''.join(parts)
+
+class SoupArticleParser:
+    """Original backend: BeautifulSoup plus the scraper's extract_* methods"""
+
+    def __init__(self, scraper, features: str = 'html.parser'):
+        self.scraper = scraper
+        self.features = features
+
+    def parse(self, url: str, content: bytes) -> Dict:
+        soup = BeautifulSoup(content, self.features)
+        scraper = self.scraper
+
+        return {
+            'url': url,
+            'title': scraper.extract_title(soup),
+            'content': scraper.extract_content(soup),
+            'summary': scraper.extract_summary(soup),
+            'author': scraper.extract_author(soup),
+            'category': scraper.extract_category(url, soup),
+            'published_date': scraper.extract_published_date(soup),
+            'image_url': scraper.extract_image_url(soup),
+            'tags': scraper.extract_tags(soup)
+        }
+
+class LxmlArticleParser:
+    """Fast backend: lxml tree, pre-compiled selectors, one walk for all fields"""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+
+    def collect_matches(self, root) -> Dict[str, List[List]]:
+        """Walk the tree once and record selector matches per field and priority"""
+        matches = {field: [[] for _ in selectors] for field, selectors in FIELD_SELECTORS.items()}
+
+        for element in root.iter(etree.Element):
+            tag = element.tag
+            css_class = element.get('class')
+            classes = set(css_class.split()) if css_class else ()
+
+            candidates = SELECTOR_INDEX.get(('tag', tag), [])
+            for name in classes:
+                candidates = candidates + SELECTOR_INDEX.get(('class', name), [])
+
+            for field, priority, selector in candidates:
+                found = matches[field][priority]
+                if found and field not in MULTI_MATCH_FIELDS:
+                    continue
+                if selector.matches(element, classes):
+                    found.append(element)
+
+        return matches
+
+    @staticmethod
+    def first(matches: List[List]):
+        """First element of the highest-priority selector that matched"""
+        for found in matches:
+            if found:
+                return found[0]
+        return None
+
+    def parse(self, url: str, content: bytes) -> Dict:
+        root = html.document_fromstring(content, parser=HTML_PARSER)
+        matches = self.collect_matches(root)
+
+        title_el = self.first(matches['title'])
+        summary_el = self.first(matches['summary'])
+        author_el = self.first(matches['author'])
+        date_el = self.first(matches['date'])
+
+        return {
+            'url': url,
+            'title': element_text(title_el) if title_el is not None else "",
+            'content': self.extract_content(matches['content']),
+            'summary': element_text(summary_el) if summary_el is not None else "",
+            'author': element_text(author_el) if author_el is not None else "",
+            'category': self.extract_category(url, matches['breadcrumb']),
+            'published_date': self.scraper.parse_vietnamese_date(element_text(date_el)) if date_el is not None else None,
+            'image_url': self.extract_image_url(matches['image']),
+            'tags': self.extract_tags(matches['tags'])
+        }
+
+    def extract_content(self, matches: List[List]) -> str:
+        content_el = self.first(matches)
+        if content_el is None:
+            return ""
+
+        paragraphs = [element_text(p) for p in content_el.iterdescendants('p')]
+        if paragraphs:
+            return '\n'.join(text for text in paragraphs if text)
+        return element_text(content_el)
+
+    def extract_category(self, url: str, matches: List[List]) -> str:
+        for cat_slug, cat_name in self.scraper.categories.items():
+            if f'/{cat_slug}/' in url:
+                return cat_name
+
+        breadcrumb = self.first(matches)
+        if breadcrumb is not None:
+            links = list(breadcrumb.iterdescendants('a'))
+            if len(links) > 1:
+                return element_text(links[1])
+
+        return "Khác"
+
+    def extract_image_url(self, matches: List[List]) -> str:
+        # Like select_one: only the first match of each selector is considered
+        for found in matches:
+            if found and found[0].get('src'):
+                img_url = found[0].get('src')
+                if img_url.startswith('//'):
+                    img_url = 'https:' + img_url
+                elif img_url.startswith('/'):
+                    img_url = self.scraper.base_url + img_url
+                return img_url
+        return ""
+
+    def extract_tags(self, matches: List[List]) -> List[str]:
+        tags = []
+        for found in matches:
+            for tag_el in found:
+                tag_text = element_text(tag_el)
+                if tag_text and tag_text not in tags:
+                    tags.append(tag_text)
+        return tags
+
+def create_parser(scraper, backend: str):
+    """Build the article parser for a backend name"""
+    if backend == 'lxml':
+        return LxmlArticleParser(scraper)
+    if backend == 'html.parser':
+        return SoupArticleParser(scraper, 'html.parser')
+    raise ValueError(f"Unknown parser backend '{backend}', expected one of {PARSER_BACKENDS}")
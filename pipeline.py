@@ -0,0 +1,186 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from database import SessionLocal
+from extraction import parse_in_worker
+from ingestion import ingest_articles, KnownUrls
+from scraper import VnExpressScraper, DEFAULT_MAX_WORKERS, DEFAULT_PARSER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSE_WORKERS = int(os.getenv('SCRAPE_PARSE_WORKERS', str(os.cpu_count() or 1)))
+DEFAULT_QUEUE_SIZE = int(os.getenv('SCRAPE_QUEUE_SIZE', '64'))
+DEFAULT_WRITE_BATCH_SIZE = int(os.getenv('SCRAPE_WRITE_BATCH_SIZE', '50'))
+
+# Marks the end of a stage's input
+_DONE = object()
+
+@dataclass
+class PipelineResult:
+    discovered: int = 0
+    fetched: int = 0
+    failed: int = 0
+    parsed: int = 0
+    inserted: int = 0
+    skipped: int = 0
+
+class ScrapePipeline:
+    """Fetch, parse and store articles in separate stages
+
+    Fetcher threads download article pages and put the raw bytes on a bounded
+    queue. A dispatcher hands them to a process pool of parsers, and a single
+    writer thread stores the parsed articles in batches. Every hand-off is a
+    bounded queue, so a slow stage makes the ones before it wait instead of
+    piling up pages in memory.
+    """
+
+    def __init__(self, scraper: Optional[VnExpressScraper] = None,
+                 fetch_workers: int = DEFAULT_MAX_WORKERS,
+                 parse_workers: int = DEFAULT_PARSE_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE):
+        self.scraper = scraper or VnExpressScraper(parser=DEFAULT_PARSER)
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.write_batch_size = write_batch_size
+        self.result = PipelineResult()
+        self._lock = threading.Lock()
+
+    def _count(self, field: str, amount: int = 1):
+        with self._lock:
+            setattr(self.result, field, getattr(self.result, field) + amount)
+
+    def _fetcher(self, url_queue: queue.Queue, raw_queue: queue.Queue):
+        while True:
+            url = url_queue.get()
+            if url is _DONE:
+                return
+            try:
+                response = self.scraper.controller.get(url, timeout=15)
+                response.raise_for_status()
+                raw_queue.put((url, response.content))
+                self._count('fetched')
+            except Exception as e:
+                logger.error(f"Error fetching article {url}: {e}")
+                self.scraper.defer(url, e)
+                self._count('failed')
+
+    def _dispatcher(self, raw_queue: queue.Queue, parsed_queue: queue.Queue, executor: ProcessPoolExecutor):
+        # If the pool breaks (a parser process died), the remaining pages are
+        # drained and counted as failed so the fetchers and the writer still finish
+        broken = False
+        try:
+            while True:
+                item = raw_queue.get()
+                if item is _DONE:
+                    return
+                if broken:
+                    self._count('failed')
+                    continue
+                url, content = item
+                try:
+                    future = executor.submit(
+                        parse_in_worker, self.scraper.parser_backend, self.scraper.base_url, url, content
+                    )
+                except Exception as e:
+                    logger.error(f"Parser pool unavailable, dropping the remaining pages: {e}")
+                    broken = True
+                    self._count('failed')
+                    continue
+                parsed_queue.put(future)
+        finally:
+            parsed_queue.put(_DONE)
+
+    def _writer(self, parsed_queue: queue.Queue, known_urls: Optional[KnownUrls]):
+        db = SessionLocal()
+        batch: List[Dict] = []
+
+        def flush():
+            if not batch:
+                return
+            try:
+                result = ingest_articles(db, batch, known_urls=known_urls)
+                self._count('inserted', result.inserted)
+                self._count('skipped', result.skipped)
+            except Exception as e:
+                logger.error(f"Error storing {len(batch)} articles: {e}")
+                db.rollback()
+                self._count('failed', len(batch))
+            batch.clear()
+
+        try:
+            while True:
+                try:
+                    future = parsed_queue.get(timeout=1)
+                except queue.Empty:
+                    flush()
+                    continue
+                if future is _DONE:
+                    break
+                try:
+                    batch.append(future.result())
+                    self._count('parsed')
+                except Exception as e:
+                    logger.error(f"Error parsing article: {e}")
+                    self._count('failed')
+                if len(batch) >= self.write_batch_size:
+                    flush()
+            flush()
+        finally:
+            db.close()
+
+    def run(self, categories: List[str], limit: int,
+            discover: Optional[Callable[[str], List[str]]] = None) -> PipelineResult:
+        """Crawl the given categories, up to limit new articles each
+
+        discover, if given, replaces the scraper's link collection and returns
+        the links to fetch for a category (limit is then ignored).
+        """
+        discover = discover or (lambda category: self.scraper.collect_article_links(category, limit))
+        self.result = PipelineResult()
+        url_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        raw_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        parsed_queue: queue.Queue = queue.Queue(maxsize=self.parse_workers * 2)
+
+        # Spawned workers avoid forking a process that already runs threads; they
+        # only import extraction (no database or HTTP session) to run parse_in_worker
+        executor = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        fetchers = [
+            threading.Thread(target=self._fetcher, args=(url_queue, raw_queue), daemon=True)
+            for _ in range(self.fetch_workers)
+        ]
+        dispatcher = threading.Thread(target=self._dispatcher, args=(raw_queue, parsed_queue, executor), daemon=True)
+        writer = threading.Thread(target=self._writer, args=(parsed_queue, self.scraper.known_urls), daemon=True)
+        for thread in fetchers + [dispatcher, writer]:
+            thread.start()
+
+        try:
+            seen = set()
+            for category in categories:
+                logger.info(f"Discovering articles in {category or 'homepage'}")
+                for url in discover(category):
+                    if url not in seen:
+                        seen.add(url)
+                        self._count('discovered')
+                        url_queue.put(url)
+        finally:
+            for _ in fetchers:
+                url_queue.put(_DONE)
+            for thread in fetchers:
+                thread.join()
+            raw_queue.put(_DONE)
+            dispatcher.join()
+            writer.join()
+            executor.shutdown()
+
+        return self.result
@@ -0,0 +1,39 @@
+import os
+from typing import Dict, Optional
+
+from database import NewsArticle
+from schemas import NewsArticleResponse
+
+# fields=compact returns these columns only; content is never loaded
+COMPACT_COLUMNS = (
+    NewsArticle.id,
+    NewsArticle.title,
+    NewsArticle.summary,
+    NewsArticle.category,
+    NewsArticle.url,
+    NewsArticle.image_url,
+    NewsArticle.published_date,
+    NewsArticle.view_count,
+)
+
+# Keys of a full article, in the order NewsArticleResponse serializes them
+ARTICLE_FIELDS = tuple(NewsArticleResponse.model_fields)
+
+COMPACT_SUMMARY_LENGTH = int(os.getenv('COMPACT_SUMMARY_LENGTH', '200'))
+
+def truncate_summary(summary: Optional[str], length: int = COMPACT_SUMMARY_LENGTH) -> Optional[str]:
+    """Cut a summary to at most length characters, on a word boundary"""
+    if not summary or len(summary) <= length:
+        return summary
+    cut = summary[:length].rsplit(' ', 1)[0] or summary[:length]
+    return cut.rstrip(' ,.;:') + '…'
+
+def compact_article(row) -> Dict:
+    """Fields of a compact list item from a row of COMPACT_COLUMNS"""
+    fields = dict(row._mapping)
+    fields['summary'] = truncate_summary(fields['summary'])
+    return fields
+
+def article_dict(article: NewsArticle) -> Dict:
+    """Fields of a full article, as NewsArticleResponse would dump them"""
+    return {name: getattr(article, name) for name in ARTICLE_FIELDS}
@@ -0,0 +1,345 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Attempts after the first one, and the exponential backoff between them
+SCRAPE_MAX_RETRIES = int(os.getenv('SCRAPE_MAX_RETRIES', '3'))
+SCRAPE_BACKOFF_BASE = float(os.getenv('SCRAPE_BACKOFF_BASE', '1'))
+SCRAPE_BACKOFF_MAX = float(os.getenv('SCRAPE_BACKOFF_MAX', '60'))
+# Consecutive 429/5xx/connection failures that open a host's circuit, and for how long
+SCRAPE_BREAKER_THRESHOLD = int(os.getenv('SCRAPE_BREAKER_THRESHOLD', '5'))
+SCRAPE_BREAKER_COOLDOWN = float(os.getenv('SCRAPE_BREAKER_COOLDOWN', '30'))
+SCRAPE_BREAKER_MAX_COOLDOWN = float(os.getenv('SCRAPE_BREAKER_MAX_COOLDOWN', '600'))
+# Responses slower than this count as a sign of overload for the concurrency limit
+SCRAPE_TARGET_LATENCY = float(os.getenv('SCRAPE_TARGET_LATENCY', '3'))
+SCRAPE_MIN_CONCURRENCY = int(os.getenv('SCRAPE_MIN_CONCURRENCY', '1'))
+
+# Statuses that mean "try again later" rather than "this URL is bad"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Multiplicative decrease of the concurrency limit on overload
+DECREASE_FACTOR = 0.5
+
+# How often a coroutine waiting for a concurrency slot checks again
+ASYNC_SLOT_POLL_SECONDS = 0.05
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+# Network failures of the requests session and of the async scraper's httpx client
+NETWORK_ERRORS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request is worth retrying later (overload, outage, network)"""
+    if isinstance(error, (CircuitOpenError,) + NETWORK_ERRORS):
+        return True
+    if isinstance(error, (requests.HTTPError, httpx.HTTPStatusError)) and error.response is not None:
+        return error.response.status_code in RETRY_STATUSES
+    return False
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Delay asked for by a Retry-After header (seconds or an HTTP date)"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float = SCRAPE_BACKOFF_BASE, cap: float = SCRAPE_BACKOFF_MAX) -> float:
+    """Exponential backoff with full jitter for the given retry (1 for the first)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """Per-host circuit breaker
+
+    After threshold consecutive failures a host's circuit opens and requests to
+    it fail fast for the cooldown (or the server's Retry-After, if longer).
+    Then one trial request is let through: success closes the circuit, failure
+    reopens it with the cooldown doubled, up to max_cooldown.
+    """
+
+    def __init__(self, threshold: int = SCRAPE_BREAKER_THRESHOLD, cooldown: float = SCRAPE_BREAKER_COOLDOWN,
+                 max_cooldown: float = SCRAPE_BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._cooldowns: Dict[str, float] = {}
+        self._trials: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str):
+        """Raise CircuitOpenError if requests to host are not allowed right now"""
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return
+            remaining = open_until - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(f"Circuit open for {host}, retry in {remaining:.0f}s")
+            if self._trials.get(host):
+                raise CircuitOpenError(f"Circuit half-open for {host}, waiting for the trial request")
+            self._trials[host] = True
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+            self._cooldowns.pop(host, None)
+            self._trials.pop(host, None)
+
+    def record_failure(self, host: str, retry_after: Optional[float] = None):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            trial = self._trials.pop(host, False)
+            if not trial and failures < self.threshold:
+                return
+            cooldown = self._cooldowns.get(host, self.cooldown / 2) * 2 if trial else self.cooldown
+            cooldown = min(cooldown, self.max_cooldown)
+            self._cooldowns[host] = cooldown
+            self._open_until[host] = time.monotonic() + max(cooldown, retry_after or 0)
+            logger.warning(f"Circuit opened for {host} after {failures} failures "
+                           f"({max(cooldown, retry_after or 0):.0f}s)")
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return 'closed'
+            return 'open' if open_until > time.monotonic() else 'half-open'
+
+class AdaptiveConcurrency:
+    """Concurrency limit for one host, adjusted AIMD-style
+
+    Each fast, successful response raises the limit by 1/limit (about +1 per
+    round of requests); an overload signal (429/5xx, a network error or a
+    response slower than target_latency) halves it, at most once per
+    target_latency so one burst of failures counts once.
+    """
+
+    def __init__(self, initial: int, minimum: int = SCRAPE_MIN_CONCURRENCY, maximum: Optional[int] = None,
+                 target_latency: float = SCRAPE_TARGET_LATENCY):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum or initial, self.minimum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot under the current limit"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free under the current limit"""
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    async def acquire_async(self):
+        """acquire() for the event loop: polls instead of blocking the thread"""
+        while not self.try_acquire():
+            await asyncio.sleep(ASYNC_SLOT_POLL_SECONDS)
+
+    def release(self, latency: float, overloaded: bool):
+        """Free a slot and adjust the limit from the request's outcome"""
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded or latency > self.target_latency:
+                if now - self._last_decrease >= self.target_latency:
+                    self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+@dataclass
+class RequestStats:
+    """Counters since the last reset"""
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    rejected: int = 0
+
+class RequestController:
+    """Retries, circuit breaking and adaptive concurrency around a requests session
+
+    get() waits for a slot under the host's AIMD concurrency limit and the
+    requests-per-second cap, then sends the request. 429/5xx responses and
+    network errors are retried up to max_retries times with exponential backoff
+    and jitter, or after the server's Retry-After if it sent one. A Retry-After
+    longer than the backoff cap, or a failure that opens the host's circuit,
+    fails the request at once instead of blocking the thread.
+    """
+
+    def __init__(self, session: requests.Session, rate_limiter, max_concurrency: int,
+                 max_retries: int = SCRAPE_MAX_RETRIES, breaker: Optional[CircuitBreaker] = None):
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = RequestStats()
+        self._limits: Dict[str, AdaptiveConcurrency] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> AdaptiveConcurrency:
+        with self._lock:
+            if host not in self._limits:
+                self._limits[host] = AdaptiveConcurrency(self.max_concurrency)
+            return self._limits[host]
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def before_attempt(self, host: str):
+        """Raise CircuitOpenError (and count it) if the host's circuit is open"""
+        try:
+            self.breaker.before_request(host)
+        except CircuitOpenError:
+            self._count('rejected')
+            raise
+
+    def after_attempt(self, url: str, host: str, attempt: int, response, error: Optional[Exception]) -> Optional[float]:
+        """Record the outcome of an attempt; seconds to wait before retrying, or None on success
+
+        Raises the error (or the error status) when the request is given up:
+        after max_retries, on a Retry-After longer than the backoff cap, or when
+        the failure opened the host's circuit.
+        """
+        if error is None and response.status_code not in RETRY_STATUSES:
+            self.breaker.record_success(host)
+            return None
+
+        retry_after = retry_after_seconds(response) if response is not None else None
+        self.breaker.record_failure(host, retry_after)
+        if (attempt > self.max_retries or (retry_after or 0) > SCRAPE_BACKOFF_MAX
+                or self.breaker.state(host) == 'open'):
+            self._count('failures')
+            if error is not None:
+                raise error
+            response.raise_for_status()
+        self._count('retries')
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        logger.info(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 1}): "
+                    f"{error or response.status_code}")
+        return delay
+
+    def unexpected_error(self, host: str):
+        """Count an error that is neither a response nor a network failure
+
+        A broken chunked body or too many redirects still counts against the
+        host, so a half-open trial always ends.
+        """
+        self.breaker.record_failure(host)
+        self._count('failures')
+
+    def get(self, url: str, timeout: float, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a URL with retries; error statuses that are not retried are returned as is"""
+        host = urlparse(url).netloc
+        limiter = self.limiter(host)
+        attempt = 0
+        while True:
+            self.before_attempt(host)
+            limiter.acquire()
+            self._count('requests')
+            started = time.monotonic()
+            response, error = None, None
+            try:
+                self.rate_limiter.wait(url)
+                started = time.monotonic()
+                response = self.session.get(url, timeout=timeout, headers=headers)
+            except NETWORK_ERRORS as e:
+                error = e
+            except Exception:
+                limiter.release(time.monotonic() - started, overloaded=False)
+                self.unexpected_error(host)
+                raise
+            limiter.release(time.monotonic() - started,
+                            overloaded=error is not None or response.status_code in RETRY_STATUSES)
+
+            attempt += 1
+            delay = self.after_attempt(url, host, attempt, response, error)
+            if delay is None:
+                return response
+            time.sleep(delay)
+
+    async def aget(self, url: str, send: Callable[[], Awaitable]):
+        """get() for the event loop; send() performs one attempt (e.g. an httpx GET)
+
+        Shares the circuit breakers, concurrency limits, rate limiter and
+        counters with get(), and waits with asyncio instead of blocking.
+        """
+        host = urlparse(url).netloc
+        limiter = self.limiter(host)
+        attempt = 0
+        while True:
+            self.before_attempt(host)
+            await limiter.acquire_async()
+            self._count('requests')
+            started = time.monotonic()
+            response, error = None, None
+            try:
+                delay = self.rate_limiter.reserve(url)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                started = time.monotonic()
+                response = await send()
+            except NETWORK_ERRORS as e:
+                error = e
+            except BaseException:
+                # Including cancellation: the slot and any half-open trial are released
+                limiter.release(time.monotonic() - started, overloaded=False)
+                self.unexpected_error(host)
+                raise
+            limiter.release(time.monotonic() - started,
+                            overloaded=error is not None or response.status_code in RETRY_STATUSES)
+
+            attempt += 1
+            delay = self.after_attempt(url, host, attempt, response, error)
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+
+    def reset_stats(self) -> RequestStats:
+        """Start a new run and return the counters of the previous one"""
+        with self._lock:
+            stats, self.stats = self.stats, RequestStats()
+        return stats
+
+    def stats_dict(self) -> Dict:
+        """Counters plus each host's concurrency limit and circuit state"""
+        with self._lock:
+            hosts = {
+                host: {'concurrency_limit': round(limiter.limit, 2), 'circuit': self.breaker.state(host)}
+                for host, limiter in self._limits.items()
+            }
+            return {**asdict(self.stats), 'hosts': hosts}
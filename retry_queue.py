@@ -0,0 +1,88 @@
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from database import ReadSessionLocal, RetryItem, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Minutes before the first retry of a failed article; doubles with each attempt
+RETRY_QUEUE_BASE_MINUTES = float(os.getenv('RETRY_QUEUE_BASE_MINUTES', '5'))
+RETRY_QUEUE_MAX_MINUTES = float(os.getenv('RETRY_QUEUE_MAX_MINUTES', '720'))
+# Failed runs after which an article is given up on
+RETRY_QUEUE_MAX_ATTEMPTS = int(os.getenv('RETRY_QUEUE_MAX_ATTEMPTS', '5'))
+# Articles retried per scheduler tick at most
+RETRY_QUEUE_BATCH = int(os.getenv('RETRY_QUEUE_BATCH', '50'))
+
+class RetryQueue:
+    """Articles that failed with a transient error, kept in the retry_queue table
+
+    The request controller already retries within a run; what still fails
+    (an open circuit, a long Retry-After, an outage) is queued here and fetched
+    again by a later run, each time after a longer, jittered delay. After
+    RETRY_QUEUE_MAX_ATTEMPTS failed runs the article is dropped.
+    """
+
+    def add(self, url: str, error: str, now: Optional[datetime] = None):
+        """Record a failed attempt and schedule the next one"""
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            item = db.get(RetryItem, url)
+            if item is None:
+                item = RetryItem(url=url, attempts=0, first_failed_at=now)
+            item.attempts += 1
+            if item.attempts > RETRY_QUEUE_MAX_ATTEMPTS:
+                logger.warning(f"Giving up on {url} after {item.attempts - 1} retries: {error}")
+                if item in db:
+                    db.delete(item)
+                db.commit()
+                return
+            item.last_error = error
+            item.last_failed_at = now
+            item.next_attempt_at = now + timedelta(minutes=self.delay_minutes(item.attempts))
+            db.add(item)
+            db.commit()
+        finally:
+            db.close()
+
+    def delay_minutes(self, attempts: int) -> float:
+        """Wait before the next retry of an article that failed this many times"""
+        delay = min(RETRY_QUEUE_BASE_MINUTES * 2 ** (attempts - 1), RETRY_QUEUE_MAX_MINUTES)
+        return delay * random.uniform(0.8, 1.2)
+
+    def due(self, limit: int = RETRY_QUEUE_BATCH, now: Optional[datetime] = None) -> List[str]:
+        """URLs whose next attempt has come, longest waiting first"""
+        now = now or datetime.utcnow()
+        db = ReadSessionLocal()
+        try:
+            rows = db.query(RetryItem.url).filter(
+                RetryItem.next_attempt_at <= now
+            ).order_by(RetryItem.next_attempt_at).limit(limit)
+            return [url for (url,) in rows]
+        finally:
+            db.close()
+
+    def settle(self, urls: List[str], started: datetime) -> int:
+        """Remove retried URLs that did not fail again since started; returns how many"""
+        if not urls:
+            return 0
+        db = SessionLocal()
+        try:
+            removed = db.query(RetryItem).filter(
+                RetryItem.url.in_(urls),
+                RetryItem.last_failed_at < started
+            ).delete(synchronize_session=False)
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def __len__(self) -> int:
+        db = ReadSessionLocal()
+        try:
+            return db.query(RetryItem).count()
+        finally:
+            db.close()
@@ -1,90 +1,171 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from database import SessionLocal, NewsArticle
+from database import SessionLocal
+from ingestion import ingest_articles, KnownUrls
 from scraper import VnExpressScraper
-import json
+from pipeline import ScrapePipeline
+from coordination import get_backend
+from frontier import CrawlFrontier, FRONTIER_MIN_INTERVAL_MINUTES
+from retry_queue import RetryQueue, RETRY_QUEUE_BATCH
+from contextlib import contextmanager
+from datetime import datetime
 import logging
+import os
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Polling interval of a category until its publishing rate is known
+SCHEDULER_INTERVAL_MINUTES = int(os.getenv('SCHEDULER_INTERVAL_MINUTES', '30'))
+# How often the scheduler wakes up to crawl the categories that are due
+SCHEDULER_TICK_MINUTES = float(os.getenv('SCHEDULER_TICK_MINUTES', str(FRONTIER_MIN_INTERVAL_MINUTES)))
+
+# Lock that makes only one worker process run each scheduled crawl
+SCRAPE_LOCK = 'scheduled_scrape'
+
+# Categories polled by the scheduler ('' is the homepage)
+SCHEDULED_CATEGORIES = ['', 'thoi-su', 'the-gioi', 'kinh-doanh', 'the-thao', 'giai-tri', 'suc-khoe', 'giao-duc']
+
 class NewsScheduler:
     def __init__(self):
         self.scheduler = BackgroundScheduler()
         self.scraper = VnExpressScraper()
+        self.concurrent = os.getenv('SCRAPE_CONCURRENT', 'true').lower() == 'true'
+        self.use_pipeline = os.getenv('SCRAPE_PIPELINE', 'false').lower() == 'true'
+        self.frontier = CrawlFrontier(self.scraper, initial_interval_minutes=SCHEDULER_INTERVAL_MINUTES)
+        # Articles that failed transiently are queued and retried on later ticks
+        self.retry_queue = RetryQueue()
+        self.scraper.retry_queue = self.retry_queue
         
     def start(self):
         """Start the scheduler"""
-        # Schedule scraping every 30 minutes
+        # Check for due categories every SCHEDULER_TICK_MINUTES (5 by default)
         self.scheduler.add_job(
             func=self.scheduled_scrape,
-            trigger=IntervalTrigger(minutes=30),
+            trigger=IntervalTrigger(minutes=SCHEDULER_TICK_MINUTES),
             id='scrape_news',
             name='Scrape VnExpress News',
             replace_existing=True
         )
         
         self.scheduler.start()
-        logger.info("News scheduler started - scraping every 30 minutes")
+        logger.info(f"News scheduler started - checking for due categories every {SCHEDULER_TICK_MINUTES} minutes")
     
     def stop(self):
         """Stop the scheduler"""
         self.scheduler.shutdown()
         logger.info("News scheduler stopped")
     
+    def claim_run(self) -> bool:
+        """Claim this tick's crawl for the current process, or renew the claim
+        
+        Every gunicorn worker runs its own scheduler. The first one to fire takes
+        the lock for most of a tick and does not release it, so the other
+        workers skip this run and the next tick starts a new race. A long crawl
+        renews the lock before each category, or from a heartbeat in pipeline mode.
+        """
+        try:
+            return get_backend().acquire_lock(SCRAPE_LOCK, SCHEDULER_TICK_MINUTES * 60 * 0.9)
+        except Exception as e:
+            logger.error(f"Could not acquire scheduler lock: {e}")
+            return False
+    
+    @contextmanager
+    def holding_lock(self, lost: threading.Event):
+        """Renew the scheduler lock from a heartbeat thread while the block runs
+        
+        The pipeline fetches in the background while it discovers, so the lock
+        cannot be renewed between categories. lost is set if a renewal fails.
+        """
+        done = threading.Event()
+        
+        def heartbeat():
+            while not done.wait(SCHEDULER_TICK_MINUTES * 60 * 0.3):
+                if not self.claim_run():
+                    logger.warning("Lost the scheduler lock, not discovering further categories")
+                    lost.set()
+                    return
+        
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+    
     def scheduled_scrape(self):
-        """Scheduled scraping task"""
+        """Scheduled scraping task: crawl the categories that are due, back to their watermarks"""
+        if not self.claim_run():
+            logger.info("Scheduled scraping is handled by another worker this tick")
+            return
+        
         try:
-            logger.info("Starting scheduled news scraping...")
+            # Skip links that are already stored before fetching them
+            if self.scraper.known_urls is None:
+                self.scraper.known_urls = KnownUrls.load()
+            self.scraper.controller.reset_stats()
+            
+            self.retry_failed()
+            
+            categories = self.frontier.due(SCHEDULED_CATEGORIES)
+            if not categories:
+                return
+            
+            logger.info(f"Starting scheduled news scraping for {', '.join(c or 'homepage' for c in categories)}...")
+            if self.scraper.http_cache:
+                self.scraper.http_cache.reset_stats()
             
-            # Scrape from multiple categories with more articles per category
-            categories = ['', 'thoi-su', 'the-gioi', 'kinh-doanh', 'the-thao', 'giai-tri', 'suc-khoe', 'giao-duc']
             total_scraped = 0
             
+            if self.use_pipeline:
+                discoveries = {}
+                lost = threading.Event()
+                
+                def discover(category):
+                    if lost.is_set():
+                        return []  # left for whichever worker holds the lock next
+                    discoveries[category] = self.frontier.discover(category)
+                    return discoveries[category].links
+                
+                with self.holding_lock(lost):
+                    result = ScrapePipeline(self.scraper).run(categories, 0, discover=discover)
+                for category, discovery in discoveries.items():
+                    self.frontier.record(category, discovery)
+                logger.info(f"Scheduled scraping completed. Pipeline result: {result}")
+                logger.info(f"Requests: {self.scraper.controller.stats_dict()}")
+                return
+            
             db = SessionLocal()
             
             for category in categories:
+                if not self.claim_run():
+                    logger.info("Lost the scheduler lock, leaving the other categories for the next tick")
+                    break
                 try:
                     logger.info(f"Scraping category: {category or 'homepage'}")
-                    # Increase limit to get more articles per category
-                    articles_data = self.scraper.scrape_multiple_articles(category, 15)
+                    discovery = self.frontier.discover(category)
+                    articles_data = self.scraper.scrape_articles(discovery.links, concurrent=self.concurrent)
                     
-                    scraped_count = 0
-                    for article_data in articles_data:
-                        # Check if article already exists
-                        existing_article = db.query(NewsArticle).filter(
-                            NewsArticle.url == article_data['url']
-                        ).first()
-                        
-                        if not existing_article:
-                            # Create new article
-                            db_article = NewsArticle(
-                                title=article_data.get('title', ''),
-                                content=article_data.get('content', ''),
-                                summary=article_data.get('summary', ''),
-                                author=article_data.get('author', ''),
-                                category=article_data.get('category', ''),
-                                url=article_data['url'],
-                                image_url=article_data.get('image_url', ''),
-                                published_date=article_data.get('published_date'),
-                                tags=json.dumps(article_data.get('tags', []), ensure_ascii=False)
-                            )
-                            
-                            db.add(db_article)
-                            scraped_count += 1
+                    result = ingest_articles(db, articles_data, known_urls=self.scraper.known_urls)
+                    self.frontier.record(category, discovery)
                     
-                    total_scraped += scraped_count
-                    logger.info(f"Scraped {scraped_count} new articles from {category or 'homepage'}")
+                    total_scraped += result.inserted
+                    logger.info(f"Scraped {result.inserted} new articles from {category or 'homepage'} ({result.skipped} already stored)")
                     
                 except Exception as e:
                     logger.error(f"Error scraping category {category}: {e}")
+                    db.rollback()
                     continue
             
-            db.commit()
             db.close()
             
             logger.info(f"Scheduled scraping completed. Total new articles: {total_scraped}")
+            if self.scraper.http_cache:
+                logger.info(f"Listing page cache: {self.scraper.http_cache.stats_dict()}")
+            logger.info(f"Requests: {self.scraper.controller.stats_dict()}")
             
         except Exception as e:
             logger.error(f"Error in scheduled scraping: {e}")
@@ -92,5 +173,28 @@ class NewsScheduler:
                 db.rollback()
                 db.close()
 
+    def retry_failed(self):
+        """Fetch the queued articles that are due for another attempt and store them"""
+        urls = self.retry_queue.due(RETRY_QUEUE_BATCH)
+        if not urls:
+            return
+        
+        logger.info(f"Retrying {len(urls)} articles that failed earlier")
+        started = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            pending = self.scraper.filter_new_links(urls, [])
+            articles_data = self.scraper.scrape_articles(pending, concurrent=self.concurrent)
+            result = ingest_articles(db, articles_data, known_urls=self.scraper.known_urls)
+            logger.info(f"Retried articles: {result.inserted} stored, {len(pending) - len(articles_data)} failed again")
+        except Exception as e:
+            logger.error(f"Error retrying failed articles: {e}")
+            db.rollback()
+            return
+        finally:
+            db.close()
+        # Articles that failed again were re-queued by the scraper after started
+        self.retry_queue.settle(urls, started)
+
 # Global scheduler instance
 scheduler = NewsScheduler()
\ No newline at end of file
@@ -27,10 +27,45 @@ class NewsArticleResponse(NewsArticleBase):
 
 class NewsArticleList(BaseModel):
     articles: List[NewsArticleResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Matching articles (omitted when with_total=false)")
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page")
+
+class NewsArticleSearchResult(NewsArticleResponse):
+    snippet: Optional[str] = Field(None, description="Matching excerpt with <mark> highlights")
+
+class NewsArticleSearchList(NewsArticleList):
+    articles: List[NewsArticleSearchResult]
+
+class NewsArticleCompact(BaseModel):
+    """List item for fields=compact: no content, summary truncated"""
+    id: int
+    title: str
+    summary: Optional[str] = Field(None, description="Article summary, truncated")
+    category: Optional[str] = None
+    url: str
+    image_url: Optional[str] = None
+    published_date: Optional[datetime] = None
+    view_count: int
+
+class NewsArticleCompactList(NewsArticleList):
+    articles: List[NewsArticleCompact]
+
+class NewsArticleCompactSearchResult(NewsArticleCompact):
+    snippet: Optional[str] = Field(None, description="Matching excerpt with <mark> highlights")
+
+class NewsArticleCompactSearchList(NewsArticleList):
+    articles: List[NewsArticleCompactSearchResult]
+
+class TagResponse(BaseModel):
+    name: str
+    slug: str = Field(..., description="Use in /tags/{tag}/articles")
+    count: int = Field(..., description="Active articles with this tag")
+
+class TagList(BaseModel):
+    tags: List[TagResponse]
 
 class ScrapeRequest(BaseModel):
     category: Optional[str] = Field(None, description="Category to scrape (optional)")
@@ -49,4 +84,14 @@ class StatsResponse(BaseModel):
     total_articles: int
     articles_by_category: dict
     recent_articles_count: int
-    active_articles_count: int
\ No newline at end of file
+    active_articles_count: int
+
+class StatsBucket(BaseModel):
+    start: datetime = Field(..., description="Start of the hour or day (UTC)")
+    total: int = Field(..., description="Articles scraped in the bucket")
+    active: int = Field(..., description="Of those, articles not deleted since")
+
+class StatsTimeline(BaseModel):
+    interval: str
+    category: Optional[str] = Field(None, description="Category slug, if filtered")
+    buckets: List[StatsBucket]
\ No newline at end of file
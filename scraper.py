@@ -2,103 +2,189 @@ import requests
 from bs4 import BeautifulSoup
 import json
 import re
-from datetime import datetime
 from typing import List, Dict, Optional
 from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
 import time
-import random
 
-class VnExpressScraper:
-    def __init__(self):
-        self.base_url = "https://vnexpress.net"
+from http_cache import HttpCache, DEFAULT_CACHE_DIR
+from extraction import ArticleExtractor
+from request_controller import RequestController, is_transient
+
+DEFAULT_REQUESTS_PER_SECOND = float(os.getenv('SCRAPE_REQUESTS_PER_SECOND', '2'))
+DEFAULT_MAX_WORKERS = int(os.getenv('SCRAPE_MAX_WORKERS', '8'))
+DEFAULT_MAX_PAGES = int(os.getenv('SCRAPE_MAX_PAGES', '5'))
+DEFAULT_PARSER = os.getenv('SCRAPE_PARSER', 'lxml')
+
+# Links read from a listing page when a known-URL filter is set
+LISTING_PAGE_WINDOW = 100
+
+class RateLimiter:
+    """Thread-safe requests-per-second cap, enforced separately for each host"""
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url: str) -> float:
+        """Reserve the next request slot for the URL's host and return the delay until it"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        return slot - now
+
+    def wait(self, url: str):
+        """Block until a request to the URL's host is allowed"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+class VnExpressScraper(ArticleExtractor):
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 base_url: str = "https://vnexpress.net",
+                 use_http_cache: bool = True,
+                 parser: str = DEFAULT_PARSER):
+        super().__init__(base_url, parser)
+        self.site_host = urlparse(self.base_url).netloc.replace('www.', '', 1)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
-        # Category mappings
-        self.categories = {
-            'thoi-su': 'Thời sự',
-            'goc-nhin': 'Góc nhìn',
-            'the-gioi': 'Thế giới',
-            'kinh-doanh': 'Kinh doanh',
-            'bat-dong-san': 'Bất động sản',
-            'khoa-hoc': 'Khoa học',
-            'giai-tri': 'Giải trí',
-            'the-thao': 'Thể thao',
-            'phap-luat': 'Pháp luật',
-            'giao-duc': 'Giáo dục',
-            'suc-khoe': 'Sức khỏe',
-            'doi-song': 'Đời sống',
-            'du-lich': 'Du lịch',
-            'so-hoa': 'Số hóa',
-            'xe': 'Xe',
-            'oto': 'Ô tô'
-        }
+        # Concurrent mode settings: bounded worker pool plus a per-host politeness cap
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(max_workers, 10))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Retries, per-host circuit breaker and AIMD concurrency around the session
+        self.controller = RequestController(self.session, self.rate_limiter, max_workers)
+        
+        # Optional container of already-stored URLs (see ingestion.KnownUrls);
+        # links found in it are skipped before their pages are downloaded
+        self.known_urls = None
+        # Optional persistent queue of articles that failed transiently (see
+        # retry_queue.RetryQueue); they are fetched again on a later run
+        self.retry_queue = None
+        self.max_pages = DEFAULT_MAX_PAGES
+        
+        # Conditional-request cache for listing pages (disabled by an empty SCRAPE_HTTP_CACHE_DIR)
+        self.http_cache = HttpCache() if use_http_cache and DEFAULT_CACHE_DIR else None
+    
+    def category_url(self, category: str = '') -> str:
+        """Listing page URL for a category, or the homepage"""
+        if category and category in self.categories:
+            return f"{self.base_url}/{category}"
+        return self.base_url
+    
+    def page_url(self, category: str, page: int) -> Optional[str]:
+        """Paginated listing URL for a category, or None if the category is unknown"""
+        if category and category in self.categories:
+            return f"{self.base_url}/{category}-p{page}"
+        return None
     
     def get_article_links(self, category: str = '', limit: int = 20) -> List[str]:
         """Get article links from VnExpress homepage or category page"""
         try:
-            if category and category in self.categories:
-                url = f"{self.base_url}/{category}"
-            else:
-                url = self.base_url
+            url = self.category_url(category)
             
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find article links
-            article_links = []
-            
-            # Multiple selectors for different article types
-            article_selectors = [
-                'article.item-news',
-                '.item-news',
-                '.title-news',
-                '.item-news-common',
-                '.box-category-item',
-                '.list-news-subfolder .item-news'
-            ]
-            
-            # Try different selectors to get more articles
-            for selector in article_selectors:
-                articles = soup.select(selector)
-                for article in articles:
-                    if len(article_links) >= limit:
-                        break
-                    link_tag = article.find('a', href=True)
-                    if link_tag and link_tag['href']:
-                        full_url = urljoin(self.base_url, link_tag['href'])
-                        if self.is_valid_article_url(full_url) and full_url not in article_links:
-                            article_links.append(full_url)
-            
-            # Additional articles from all links on page
-            if len(article_links) < limit:
-                all_links = soup.find_all('a', href=True)
-                for link in all_links:
-                    if len(article_links) >= limit:
-                        break
-                    href = link.get('href', '')
-                    if href and self.is_valid_article_url(href):
-                        full_url = urljoin(self.base_url, href)
-                        if full_url not in article_links:
-                            article_links.append(full_url)
+            content, unchanged = self.fetch_listing(url)
             
-            return article_links[:limit]
+            return self.parse_listing(url, f'links:{limit}', unchanged,
+                                      self.parse_article_links, content, limit)
             
         except Exception as e:
             print(f"Error getting article links: {e}")
             return []
     
+    def fetch_listing(self, url: str):
+        """Download a listing page, conditionally if it is in the HTTP cache
+        
+        Returns (content, unchanged) where unchanged means the page is the same as
+        the cached copy, either from a 304 response or an identical body hash.
+        """
+        if self.http_cache is None:
+            response = self.controller.get(url, timeout=10)
+            response.raise_for_status()
+            return response.content, False
+        
+        headers = self.http_cache.conditional_headers(url)
+        response = self.controller.get(url, timeout=10, headers=headers)
+        if response.status_code == 304:
+            return self.http_cache.not_modified(url), True
+        response.raise_for_status()
+        return response.content, self.http_cache.store(url, response.headers, response.content)
+    
+    def parse_listing(self, url: str, key: str, unchanged: bool, parse, *args) -> List[str]:
+        """Run a listing parser, reusing the cached result when the page is unchanged"""
+        if self.http_cache is None:
+            return parse(*args)
+        
+        if unchanged:
+            cached = self.http_cache.get_parsed(url, key)
+            if cached is not None:
+                return cached
+        
+        result = parse(*args)
+        self.http_cache.set_parsed(url, key, result)
+        return result
+    
+    def parse_article_links(self, content: bytes, limit: int = 20) -> List[str]:
+        """Extract article links from a homepage or category page"""
+        soup = BeautifulSoup(content, self.soup_features)
+        
+        # Find article links
+        article_links = []
+        
+        # Multiple selectors for different article types
+        article_selectors = [
+            'article.item-news',
+            '.item-news',
+            '.title-news',
+            '.item-news-common',
+            '.box-category-item',
+            '.list-news-subfolder .item-news'
+        ]
+        
+        # Try different selectors to get more articles
+        for selector in article_selectors:
+            articles = soup.select(selector)
+            for article in articles:
+                if len(article_links) >= limit:
+                    break
+                link_tag = article.find('a', href=True)
+                if link_tag and link_tag['href']:
+                    full_url = urljoin(self.base_url, link_tag['href'])
+                    if self.is_valid_article_url(full_url) and full_url not in article_links:
+                        article_links.append(full_url)
+        
+        # Additional articles from all links on page
+        if len(article_links) < limit:
+            all_links = soup.find_all('a', href=True)
+            for link in all_links:
+                if len(article_links) >= limit:
+                    break
+                href = link.get('href', '')
+                if href and self.is_valid_article_url(href):
+                    full_url = urljoin(self.base_url, href)
+                    if full_url not in article_links:
+                        article_links.append(full_url)
+        
+        return article_links[:limit]
+    
     def is_valid_article_url(self, url: str) -> bool:
         """Check if URL is a valid VnExpress article"""
         if not url or not isinstance(url, str):
             return False
         
-        # Check if it's a VnExpress URL
-        if 'vnexpress.net' not in url:
+        # Check if it's a VnExpress URL (or one on the configured base host)
+        if self.site_host not in urlparse(url).netloc:
             return False
         
         # Check if it contains article ID pattern
@@ -108,265 +194,144 @@ class VnExpressScraper:
         return False
     
     def scrape_article(self, url: str) -> Optional[Dict]:
-        """Scrape a single article from VnExpress"""
+        """Scrape a single article from VnExpress
+        
+        The request goes through the request controller (rate limit, retries,
+        circuit breaker). An article that still fails with a transient error is
+        added to the retry queue, if one is set.
+        """
         try:
-            response = self.session.get(url, timeout=15)
+            response = self.controller.get(url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract article data
-            article_data = {
-                'url': url,
-                'title': self.extract_title(soup),
-                'content': self.extract_content(soup),
-                'summary': self.extract_summary(soup),
-                'author': self.extract_author(soup),
-                'category': self.extract_category(url, soup),
-                'published_date': self.extract_published_date(soup),
-                'image_url': self.extract_image_url(soup),
-                'tags': self.extract_tags(soup)
-            }
-            
-            # Add random delay to avoid being blocked
-            time.sleep(random.uniform(1, 3))
-            
-            return article_data
+            return self.parse_article(url, response.content)
             
         except Exception as e:
             print(f"Error scraping article {url}: {e}")
+            self.defer(url, e)
             return None
     
-    def extract_title(self, soup: BeautifulSoup) -> str:
-        """Extract article title"""
-        title_selectors = [
-            'h1.title-detail',
-            'h1.title_news_detail',
-            'h1.title-news',
-            'h1',
-            '.title-detail',
-            '.title_news_detail'
-        ]
-        
-        for selector in title_selectors:
-            title_tag = soup.select_one(selector)
-            if title_tag:
-                return title_tag.get_text(strip=True)
-        
-        return ""
-    
-    def extract_content(self, soup: BeautifulSoup) -> str:
-        """Extract article content"""
-        content_selectors = [
-            '.fck_detail',
-            '.Normal',
-            'article .content-detail',
-            '.content_detail',
-            '.article-content'
-        ]
-        
-        for selector in content_selectors:
-            content_div = soup.select_one(selector)
-            if content_div:
-                # Remove ads and unwanted elements
-                for unwanted in content_div.find_all(['script', 'style', '.VCSortableInPreviewMode']):
-                    unwanted.decompose()
-                
-                # Get text content
-                paragraphs = content_div.find_all('p')
-                if paragraphs:
-                    content = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-                    return content
-                else:
-                    return content_div.get_text(strip=True)
-        
-        return ""
-    
-    def extract_summary(self, soup: BeautifulSoup) -> str:
-        """Extract article summary/description"""
-        summary_selectors = [
-            '.description',
-            '.sapo',
-            '.Lead',
-            'p.description',
-            '.article-summary'
-        ]
-        
-        for selector in summary_selectors:
-            summary_tag = soup.select_one(selector)
-            if summary_tag:
-                return summary_tag.get_text(strip=True)
-        
-        return ""
+    def defer(self, url: str, error: Exception):
+        """Queue an article for a later run if its failure was transient"""
+        if self.retry_queue is not None and is_transient(error):
+            self.retry_queue.add(url, str(error))
     
-    def extract_author(self, soup: BeautifulSoup) -> str:
-        """Extract article author"""
-        author_selectors = [
-            '.author',
-            '.article-author',
-            '.byline',
-            '.writer'
+    def filter_new_links(self, links: List[str], collected: List[str]) -> List[str]:
+        """Drop links already collected in this run or already stored (known_urls)"""
+        return [
+            url for url in links
+            if url not in collected and (self.known_urls is None or url not in self.known_urls)
         ]
-        
-        for selector in author_selectors:
-            author_tag = soup.select_one(selector)
-            if author_tag:
-                return author_tag.get_text(strip=True)
-        
-        return ""
     
-    def extract_category(self, url: str, soup: BeautifulSoup) -> str:
-        """Extract article category"""
-        # Try to get category from URL
-        for cat_slug, cat_name in self.categories.items():
-            if f'/{cat_slug}/' in url:
-                return cat_name
-        
-        # Try to get from breadcrumb
-        breadcrumb = soup.select_one('.breadcrumb')
-        if breadcrumb:
-            links = breadcrumb.find_all('a')
-            if len(links) > 1:
-                return links[1].get_text(strip=True)
+    def listing_window(self, limit: int, collected: List[str]) -> int:
+        """How many links to read from a listing page
         
-        return "Khác"
+        Without a known-URL filter every link counts towards the limit; with one,
+        most links are usually old, so the whole page is read.
+        """
+        if self.known_urls is None:
+            return limit - len(collected)
+        return max(limit, LISTING_PAGE_WINDOW)
     
-    def extract_published_date(self, soup: BeautifulSoup) -> Optional[datetime]:
-        """Extract article published date"""
-        date_selectors = [
-            '.date',
-            '.time',
-            '.publish-time',
-            '.article-date'
-        ]
+    def collect_article_links(self, category: str = '', limit: int = 20) -> List[str]:
+        """Discover up to limit article links that still need to be fetched
         
-        for selector in date_selectors:
-            date_tag = soup.select_one(selector)
-            if date_tag:
-                date_text = date_tag.get_text(strip=True)
-                return self.parse_vietnamese_date(date_text)
+        Reads the homepage or category page, then keeps paging through the category
+        until limit new links are found, a page yields nothing new, or max_pages
+        is reached.
+        """
+        article_links = self.filter_new_links(
+            self.get_article_links(category, self.listing_window(limit, [])), []
+        )
         
-        return None
-    
-    def extract_image_url(self, soup: BeautifulSoup) -> str:
-        """Extract main article image"""
-        img_selectors = [
-            '.fig-picture img',
-            '.photo img',
-            'article img',
-            '.content-detail img'
-        ]
-        
-        for selector in img_selectors:
-            img_tag = soup.select_one(selector)
-            if img_tag and img_tag.get('src'):
-                img_url = img_tag['src']
-                if img_url.startswith('//'):
-                    img_url = 'https:' + img_url
-                elif img_url.startswith('/'):
-                    img_url = self.base_url + img_url
-                return img_url
+        # If we don't have enough links from main page, try to get more from paginated results
+        page = 2
+        while len(article_links) < limit and category and page <= self.max_pages:
+            print(f"Found {len(article_links)} links, trying to get more from page {page}...")
+            page_links = self.get_article_links_from_page(
+                category, page, self.listing_window(limit, article_links)
+            )
+            new_links = self.filter_new_links(page_links, article_links)
+            if not new_links:
+                break
+            article_links.extend(new_links)
+            page += 1
         
-        return ""
+        return article_links[:limit]
     
-    def extract_tags(self, soup: BeautifulSoup) -> List[str]:
-        """Extract article tags"""
-        tags = []
+    def scrape_multiple_articles(self, category: str = '', limit: int = 20,
+                                 concurrent: bool = False) -> List[Dict]:
+        """Scrape multiple articles
         
-        # Try to find tags in various locations
-        tag_selectors = [
-            '.tags a',
-            '.article-tags a',
-            '.tag-list a'
-        ]
+        Sequential mode fetches one article at a time. Concurrent mode fetches
+        through a pool of max_workers threads, whose requests the controller
+        keeps under the host's adaptive concurrency limit. Both are throttled by
+        the per-host rate limiter and return articles in link order.
+        """
+        print(f"Getting article links for category: {category}")
+        article_links = self.collect_article_links(category, limit)
         
-        for selector in tag_selectors:
-            tag_elements = soup.select(selector)
-            for tag_elem in tag_elements:
-                tag_text = tag_elem.get_text(strip=True)
-                if tag_text and tag_text not in tags:
-                    tags.append(tag_text)
+        print(f"Found {len(article_links)} article links")
         
-        return tags
-    
-    def parse_vietnamese_date(self, date_text: str) -> Optional[datetime]:
-        """Parse Vietnamese date format"""
-        try:
-            # Remove common Vietnamese date prefixes
-            date_text = re.sub(r'^(Ngày|ngày|Thứ.*?,?\s*)', '', date_text.strip())
-            
-            # Handle different date formats
-            patterns = [
-                r'(\d{1,2})/(\d{1,2})/(\d{4})',  # DD/MM/YYYY
-                r'(\d{1,2})-(\d{1,2})-(\d{4})',  # DD-MM-YYYY
-                r'(\d{4})-(\d{1,2})-(\d{1,2})',  # YYYY-MM-DD
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, date_text)
-                if match:
-                    groups = match.groups()
-                    if len(groups) == 3:
-                        if len(groups[0]) == 4:  # YYYY-MM-DD format
-                            year, month, day = map(int, groups)
-                        else:  # DD/MM/YYYY or DD-MM-YYYY format
-                            day, month, year = map(int, groups)
-                        
-                        return datetime(year, month, day)
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error parsing date '{date_text}': {e}")
-            return None
+        return self.scrape_articles(article_links, concurrent=concurrent)
     
-    def scrape_multiple_articles(self, category: str = '', limit: int = 20) -> List[Dict]:
-        """Scrape multiple articles"""
-        print(f"Getting article links for category: {category}")
-        article_links = self.get_article_links(category, limit)
-        
-        # If we don't have enough links from main page, try to get more from paginated results
-        if len(article_links) < limit and category:
-            print(f"Found {len(article_links)} links, trying to get more from page 2...")
-            page2_links = self.get_article_links_from_page(category, 2, limit - len(article_links))
-            article_links.extend(page2_links)
+    def scrape_articles(self, urls: List[str], concurrent: bool = False) -> List[Dict]:
+        """Scrape a list of article URLs, sequentially or with the worker pool"""
+        if concurrent:
+            return self.scrape_articles_concurrently(urls)
         
-        print(f"Found {len(article_links)} article links")
         articles = []
         
-        for i, url in enumerate(article_links, 1):
-            print(f"Scraping article {i}/{len(article_links)}: {url}")
+        for i, url in enumerate(urls, 1):
+            print(f"Scraping article {i}/{len(urls)}: {url}")
             article_data = self.scrape_article(url)
             if article_data:
                 articles.append(article_data)
         
         return articles
     
+    def scrape_articles_concurrently(self, urls: List[str]) -> List[Dict]:
+        """Scrape a list of article URLs with a bounded thread pool"""
+        if not urls:
+            return []
+        
+        def scrape(indexed_url):
+            i, url = indexed_url
+            print(f"Scraping article {i}/{len(urls)}: {url}")
+            return self.scrape_article(url)
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            results = executor.map(scrape, enumerate(urls, 1))
+            return [article_data for article_data in results if article_data]
+    
     def get_article_links_from_page(self, category: str, page: int, limit: int = 10) -> List[str]:
         """Get article links from a specific page number"""
         try:
-            if category and category in self.categories:
-                url = f"{self.base_url}/{category}-p{page}"
-            else:
+            url = self.page_url(category, page)
+            if not url:
                 return []
             
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            article_links = []
+            content, unchanged = self.fetch_listing(url)
             
-            # Find article links on paginated page
-            articles = soup.find_all('article', class_='item-news')
-            for article in articles[:limit]:
-                link_tag = article.find('a', href=True)
-                if link_tag and link_tag['href']:
-                    full_url = urljoin(self.base_url, link_tag['href'])
-                    if self.is_valid_article_url(full_url):
-                        article_links.append(full_url)
-            
-            return article_links
+            return self.parse_listing(url, f'page_links:{limit}', unchanged,
+                                      self.parse_page_links, content, limit)
             
         except Exception as e:
             print(f"Error getting article links from page {page}: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def parse_page_links(self, content: bytes, limit: int = 10) -> List[str]:
+        """Extract article links from a paginated category page"""
+        soup = BeautifulSoup(content, self.soup_features)
+        article_links = []
+        
+        # Find article links on paginated page
+        articles = soup.find_all('article', class_='item-news')
+        for article in articles[:limit]:
+            link_tag = article.find('a', href=True)
+            if link_tag and link_tag['href']:
+                full_url = urljoin(self.base_url, link_tag['href'])
+                if self.is_valid_article_url(full_url):
+                    article_links.append(full_url)
+        
+        return article_links
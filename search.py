@@ -0,0 +1,96 @@
+import itertools
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import NewsArticle, FTS_TABLE
+from pagination import KEYSET_ORDER, after_cursor
+from projections import COMPACT_COLUMNS
+
+fts = table(FTS_TABLE, column('rowid'))
+
+# Column weights for bm25: title, summary, content
+RANK = literal_column(f"bm25({FTS_TABLE}, 10.0, 5.0, 1.0)")
+SNIPPET = literal_column(f"snippet({FTS_TABLE}, -1, '<mark>', '</mark>', '…', 24)").label('snippet')
+MATCH = text(f"{FTS_TABLE} MATCH :match")
+
+# Cap on d/đ spellings generated per query word
+MAX_D_VARIANTS = 3
+
+def d_variants(word: str) -> List[str]:
+    """Spellings of a word with each of its first d's as d or đ
+
+    The index folds diacritics but keeps đ distinct from d, so "duong" has to be
+    searched as both "duong" and "đuong" to find "đường".
+    """
+    word = word.replace('đ', 'd')
+    positions = [i for i, char in enumerate(word) if char == 'd'][:MAX_D_VARIANTS]
+    variants = []
+    for choice in itertools.product('dđ', repeat=len(positions)):
+        chars = list(word)
+        for position, char in zip(positions, choice):
+            chars[position] = char
+        variants.append(''.join(chars))
+    return variants
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression, or None if it has no words
+
+    Every word must appear; accents are optional ("thoi su" finds "Thời sự").
+    """
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return None
+    terms = []
+    for word in words:
+        variants = ' OR '.join(f'"{variant}"' for variant in d_variants(word))
+        terms.append(f"({variants})")
+    return ' AND '.join(terms)
+
+def matching_ids(match: str):
+    """Subquery of article ids matching an FTS5 expression"""
+    return select(fts.c.rowid).where(MATCH.bindparams(match=match)).scalar_subquery()
+
+async def search_articles(db: AsyncSession, query: str, offset: int, limit: int,
+                          sort: str = 'relevance', cursor: Optional[str] = None,
+                          with_total: bool = True, compact: bool = False) -> Tuple[List[Tuple], Optional[int]]:
+    """Active articles matching query, with highlighted snippets
+
+    sort='relevance' orders by bm25 rank; sort='date' uses the keyset order and
+    accepts a cursor from pagination.encode_cursor instead of an offset.
+    With compact=True the articles are rows of COMPACT_COLUMNS, not ORM objects.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return [], 0 if with_total else None
+
+    conditions = (MATCH.bindparams(match=match), NewsArticle.is_active == True)
+    total = None
+    if with_total:
+        total = await db.scalar(
+            select(func.count()).select_from(NewsArticle).join(fts, fts.c.rowid == NewsArticle.id).where(*conditions)
+        )
+
+    columns = (*COMPACT_COLUMNS, SNIPPET) if compact else (NewsArticle, SNIPPET)
+    page = select(NewsArticle.id).join(fts, fts.c.rowid == NewsArticle.id).where(*conditions)
+    if sort == 'date':
+        if cursor:
+            page = page.where(after_cursor(cursor))
+            offset = 0
+        order = KEYSET_ORDER
+    else:
+        order = (RANK,)
+    page = page.order_by(*order).offset(offset).limit(limit)
+
+    # snippet() is expensive on long articles, so it is only computed for the
+    # rows of the requested page rather than for every match before sorting
+    rows = select(*columns).join(fts, fts.c.rowid == NewsArticle.id).where(
+        MATCH.bindparams(match=match),
+        NewsArticle.id.in_(page.scalar_subquery())
+    ).order_by(*order)
+    result = await db.execute(rows)
+    if compact:
+        return [(row, row.snippet) for row in result.all()], total
+    return [(article, snippet) for article, snippet in result.all()], total
@@ -0,0 +1,34 @@
+import re
+import unicodedata
+
+# Site sections by URL slug
+CATEGORY_NAMES = {
+    'thoi-su': 'Thời sự',
+    'goc-nhin': 'Góc nhìn',
+    'the-gioi': 'Thế giới',
+    'kinh-doanh': 'Kinh doanh',
+    'bat-dong-san': 'Bất động sản',
+    'khoa-hoc': 'Khoa học',
+    'giai-tri': 'Giải trí',
+    'the-thao': 'Thể thao',
+    'phap-luat': 'Pháp luật',
+    'giao-duc': 'Giáo dục',
+    'suc-khoe': 'Sức khỏe',
+    'doi-song': 'Đời sống',
+    'du-lich': 'Du lịch',
+    'so-hoa': 'Số hóa',
+    'xe': 'Xe',
+    'oto': 'Ô tô'
+}
+
+CATEGORY_SLUGS = {name: slug for slug, name in CATEGORY_NAMES.items()}
+
+def slugify(name: str) -> str:
+    """URL form of a name: lowercase ASCII words joined by dashes ("Đà Nẵng" -> "da-nang")"""
+    text = unicodedata.normalize('NFKD', name.replace('đ', 'd').replace('Đ', 'D'))
+    text = text.encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-')
+
+def category_slug(category: str) -> str:
+    """Slug of a category given by slug or name ("thoi-su" and "Thời sự" -> "thoi-su")"""
+    return CATEGORY_SLUGS.get(category) or slugify(category)
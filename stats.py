@@ -0,0 +1,95 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, cast, func, literal, select, true, type_coerce
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from database import CategoryStats, HourlyStats, NewsArticle
+
+# Same text SQLAlchemy stores for a DateTime, so hours computed in SQL match
+# the keys of rows it wrote
+HOUR_FORMAT = '%Y-%m-%d %H:00:00.000000'
+DAY_FORMAT = '%Y-%m-%d 00:00:00.000000'
+
+def article_hour(column):
+    """SQL expression truncating a DateTime column to the hour"""
+    return func.strftime(HOUR_FORMAT, column)
+
+def add_to_stats(db: Session, where, total, active):
+    """Add the articles matching where to both rollups (no commit)
+
+    total and active are what each matching article adds to its buckets, e.g.
+    1 and 1 for new articles or 0 and -1 for a soft delete.
+    """
+    category = func.coalesce(NewsArticle.category, '')
+    slug = func.coalesce(NewsArticle.category_slug, '')
+    total_sum = func.sum(total)
+    active_sum = func.sum(active)
+
+    rollups = (
+        (CategoryStats, select(category, func.max(slug), total_sum, active_sum).group_by(category)),
+        (HourlyStats, select(article_hour(NewsArticle.scraped_date), slug, total_sum, active_sum).group_by(
+            article_hour(NewsArticle.scraped_date), slug
+        )),
+    )
+    for model, source in rollups:
+        table = model.__table__
+        stmt = insert(table).from_select(list(table.c.keys()), source.where(where))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={'total': table.c.total + stmt.excluded.total, 'active': table.c.active + stmt.excluded.active}
+        ))
+
+def record_new_articles(db: Session, scraped_date: datetime):
+    """Count the articles an ingest batch stored with this scraped_date"""
+    add_to_stats(db, (NewsArticle.scraped_date == scraped_date) & (NewsArticle.is_active == True),
+                 literal(1), literal(1))
+
+def record_soft_delete(db: Session, article_id: int):
+    """Move an active article to the inactive counts"""
+    add_to_stats(db, NewsArticle.id == article_id, literal(0), literal(-1))
+
+def rebuild_stats(db: Session):
+    """Recompute both rollups from news_articles (no commit)"""
+    db.execute(CategoryStats.__table__.delete())
+    db.execute(HourlyStats.__table__.delete())
+    add_to_stats(db, true(), literal(1), cast(NewsArticle.is_active, Integer))
+
+def totals_query():
+    """Total and active article counts"""
+    return select(
+        func.coalesce(func.sum(CategoryStats.total), 0).label('total'),
+        func.coalesce(func.sum(CategoryStats.active), 0).label('active')
+    )
+
+def category_counts_query():
+    """Active articles by category name, categories without any left out"""
+    return select(CategoryStats.category, CategoryStats.active).where(CategoryStats.active > 0)
+
+def slug_counts_query():
+    """Active articles by category slug"""
+    return select(CategoryStats.category_slug, func.sum(CategoryStats.active)).group_by(CategoryStats.category_slug)
+
+def bucket_start(moment: datetime) -> datetime:
+    """Start of the hourly bucket a moment falls in"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def recent_count_query(since: datetime):
+    """Active articles scraped since a moment, to the hour (the bucket holding since counts whole)"""
+    return select(func.coalesce(func.sum(HourlyStats.active), 0)).where(HourlyStats.hour >= bucket_start(since))
+
+def timeline_query(since: datetime, interval: str = 'hour', category_slug: Optional[str] = None):
+    """Articles scraped per hour or day since a moment; empty buckets are left out"""
+    start, first = HourlyStats.hour, bucket_start(since)
+    if interval == 'day':
+        start = type_coerce(func.strftime(DAY_FORMAT, HourlyStats.hour), DateTime)
+        first = first.replace(hour=0)
+    query = select(
+        start.label('start'),
+        func.sum(HourlyStats.total).label('total'),
+        func.sum(HourlyStats.active).label('active')
+    ).where(HourlyStats.hour >= first)
+    if category_slug is not None:
+        query = query.where(HourlyStats.category_slug == category_slug)
+    return query.group_by(start).order_by(start)
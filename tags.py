@@ -0,0 +1,100 @@
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from database import ArticleTag, NewsArticle, Tag
+from slugs import slugify
+
+# Slugs looked up per IN query; SQLite's default limit on bound parameters is 999
+SLUG_BATCH_SIZE = 500
+
+# Articles read per query while backfilling
+BACKFILL_CHUNK_SIZE = 1000
+
+def parse_tags(tags: Optional[str]) -> List[str]:
+    """Tags column (a JSON list in a string) as a Python list"""
+    if not tags:
+        return []
+    try:
+        parsed = json.loads(tags)
+    except ValueError:
+        return []
+    return [str(tag) for tag in parsed] if isinstance(parsed, list) else []
+
+def tag_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    """Ids of the tags with these names by slug, creating the missing ones"""
+    names_by_slug = {}
+    for name in names:
+        slug = slugify(name)
+        if slug:
+            names_by_slug.setdefault(slug, name.strip())
+    if not names_by_slug:
+        return {}
+
+    db.execute(
+        insert(Tag.__table__).on_conflict_do_nothing(index_elements=['slug']),
+        [{'name': name, 'slug': slug} for slug, name in names_by_slug.items()]
+    )
+    ids = {}
+    slugs = list(names_by_slug)
+    for i in range(0, len(slugs), SLUG_BATCH_SIZE):
+        batch = slugs[i:i + SLUG_BATCH_SIZE]
+        ids.update(db.execute(select(Tag.slug, Tag.id).where(Tag.slug.in_(batch))).all())
+    return ids
+
+def store_article_tags(db: Session, tags_by_article: Dict[int, List[str]]):
+    """Link articles to their tags in article_tags (no commit)"""
+    ids = tag_ids(db, [name for names in tags_by_article.values() for name in names])
+    links = {
+        (article_id, ids[slugify(name)])
+        for article_id, names in tags_by_article.items()
+        for name in names
+        if slugify(name) in ids
+    }
+    if links:
+        db.execute(
+            insert(ArticleTag.__table__).on_conflict_do_nothing(),
+            [{'article_id': article_id, 'tag_id': tag_id} for article_id, tag_id in links]
+        )
+
+def backfill_tags(db: Session) -> int:
+    """Populate the tag tables from the JSON tags column of every stored article"""
+    linked, last_id = 0, 0
+    while True:
+        rows = db.execute(
+            select(NewsArticle.id, NewsArticle.tags).where(
+                NewsArticle.id > last_id,
+                NewsArticle.tags.is_not(None),
+                NewsArticle.tags != '[]'
+            ).order_by(NewsArticle.id).limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        store_article_tags(db, {article_id: parse_tags(tags) for article_id, tags in rows})
+        db.commit()
+        linked += len(rows)
+        last_id = rows[-1].id
+    return linked
+
+def tag_counts_query(limit: int):
+    """Tags with their number of active articles, most used first"""
+    count = func.count(ArticleTag.article_id).label('count')
+    return select(Tag.name, Tag.slug, count).join(
+        ArticleTag, ArticleTag.tag_id == Tag.id
+    ).join(
+        NewsArticle, NewsArticle.id == ArticleTag.article_id
+    ).where(
+        NewsArticle.is_active == True
+    ).group_by(Tag.id).order_by(count.desc(), Tag.slug).limit(limit)
+
+def tagged_articles_query(tag_id: int, columns):
+    """Active articles with a tag, found through ix_article_tags_tag_id_article_id"""
+    return select(*columns).join(
+        ArticleTag, ArticleTag.article_id == NewsArticle.id
+    ).where(
+        ArticleTag.tag_id == tag_id,
+        NewsArticle.is_active == True
+    )
@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import bindparam, func, update
+
+from database import NewsArticle, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+VIEW_FLUSH_INTERVAL = float(os.getenv('VIEW_FLUSH_INTERVAL', '5'))
+VIEW_FLUSH_THRESHOLD = int(os.getenv('VIEW_FLUSH_THRESHOLD', '500'))
+
+# One executemany UPDATE adds each article's buffered views (view_count is nullable)
+ADD_VIEWS = update(NewsArticle.__table__).where(
+    NewsArticle.__table__.c.id == bindparam('article_id')
+).values(view_count=func.coalesce(NewsArticle.__table__.c.view_count, 0) + bindparam('views'))
+
+class ViewCounter:
+    """Per-worker buffer of article views, written to the database in batches
+
+    GET /articles/{id} only records the view in memory. A background thread adds
+    the buffered counts to news_articles.view_count every interval seconds, or
+    sooner once threshold views are pending. stop() writes whatever is left, so
+    counts survive shutdown and gunicorn's max_requests worker recycling.
+    """
+
+    def __init__(self, interval: float = VIEW_FLUSH_INTERVAL, threshold: int = VIEW_FLUSH_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self._pending: Counter = Counter()
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        # Serializes flushes from the background thread and stop()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, article_id: int):
+        """Count one view of an article"""
+        with self._lock:
+            self._pending[article_id] += 1
+            self._pending_total += 1
+            if self._pending_total >= self.threshold:
+                self._wake.set()
+
+    def pending(self, article_id: int) -> int:
+        """Views of an article not yet written to the database"""
+        with self._lock:
+            return self._pending.get(article_id, 0)
+
+    def flush(self) -> int:
+        """Write buffered views in one batched UPDATE; returns the views written"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, Counter()
+                self._pending_total = 0
+
+            db = SessionLocal()
+            try:
+                db.execute(ADD_VIEWS, [
+                    {'article_id': article_id, 'views': views}
+                    for article_id, views in batch.items()
+                ])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error writing {sum(batch.values())} buffered views: {e}")
+                # Keep the counts for the next attempt
+                with self._lock:
+                    self._pending.update(batch)
+                    self._pending_total += sum(batch.values())
+                return 0
+            finally:
+                db.close()
+            return sum(batch.values())
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the flusher thread (call in each worker, after gunicorn forks)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher thread and write the remaining views"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self.flush()
+
+# Buffer for this worker process
+view_counter = ViewCounter()